@@ -1,7 +1,59 @@
+import time
+
 import ccxt
 import pandas as pd
 
-def fetch_ohlcv(exchange_name='kucoin', symbol='BTC/USDT', timeframe='1h', limit=100):
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def ohlcv_to_dataframe(ohlcv):
+    """
+    Converts raw ccxt OHLCV rows into a timestamp-indexed DataFrame.
+
+    :param ohlcv: A list of [timestamp_ms, open, high, low, close, volume] rows.
+    :return: A pandas DataFrame indexed by timestamp.
+    """
+    df = pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    return df
+
+def dataframe_to_ohlcv(df):
+    """
+    Converts a timestamp-indexed OHLCV DataFrame back into raw ccxt rows.
+
+    :param df: A DataFrame as returned by fetch_ohlcv.
+    :return: A list of [timestamp_ms, open, high, low, close, volume] rows.
+    """
+    timestamps = (df.index - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+    values = df[OHLCV_COLUMNS[1:]].to_numpy().tolist()
+    return [[int(ts)] + row for ts, row in zip(timestamps, values)]
+
+def timeframe_to_ms(timeframe):
+    """
+    Converts a ccxt timeframe string (e.g. '1h') into its duration in milliseconds.
+    """
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+def closed_candles(df, now=None):
+    """
+    Drops the still-open candle from a DataFrame returned by fetch_ohlcv.
+
+    Indicators and signals computed on closed candles do not change between polls within a candle,
+    so they can be cached and never repaint. Frames without a timeframe in attrs are returned unchanged.
+
+    :param df: A DataFrame as returned by fetch_ohlcv, or None.
+    :param now: The current time in seconds, defaults to time.time().
+    :return: A DataFrame with the closed candles only and attrs['closed'] set, or df unchanged.
+    """
+    if df is None or df.empty or not df.attrs.get('timeframe'):
+        return df
+    now_ms = (time.time() if now is None else now) * 1000
+    opened_ms = (df.index - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+    closed = df[opened_ms + timeframe_to_ms(df.attrs['timeframe']) <= now_ms].copy()
+    closed.attrs.update(df.attrs, closed=True)
+    return closed
+
+def fetch_ohlcv(exchange_name='kucoin', symbol='BTC/USDT', timeframe='1h', limit=100, since=None):
     """
     Fetches historical OHLCV data for a given symbol from a specified exchange.
 
@@ -9,6 +61,7 @@ def fetch_ohlcv(exchange_name='kucoin', symbol='BTC/USDT', timeframe='1h', limit
     :param symbol: The trading pair symbol (e.g., 'BTC/USDT').
     :param timeframe: The timeframe for the OHLCV data (e.g., '1h', '4h', '1d').
     :param limit: The number of data points to fetch.
+    :param since: Optional timestamp in milliseconds; only candles from this time on are fetched.
     :return: A pandas DataFrame with OHLCV data, or None if an error occurs.
     """
     try:
@@ -16,14 +69,17 @@ def fetch_ohlcv(exchange_name='kucoin', symbol='BTC/USDT', timeframe='1h', limit
         exchange_class = getattr(ccxt, exchange_name)
         exchange = exchange_class()
 
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        if since is None:
+            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        else:
+            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
         if not ohlcv:
             print(f"No OHLCV data returned from {exchange_name} for {symbol}.")
             return None
 
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
+        df = ohlcv_to_dataframe(ohlcv)
+        # Identifies the series, e.g. for the indicator cache
+        df.attrs.update(exchange=exchange_name, symbol=symbol, timeframe=timeframe)
         return df
     except AttributeError:
         print(f"Error: Exchange '{exchange_name}' not found in ccxt.")
@@ -38,6 +94,36 @@ def fetch_ohlcv(exchange_name='kucoin', symbol='BTC/USDT', timeframe='1h', limit
         print(f"An unexpected error occurred: {e}")
         return None
 
+def fetch_tickers(exchange_name='kucoin', symbols=None):
+    """
+    Fetches the latest tickers for many symbols in one bulk request.
+
+    :param exchange_name: The name of the exchange (e.g., 'kucoin', 'gateio').
+    :param symbols: Optional list of symbols to restrict the result to.
+    :return: A dict mapping symbol to its ccxt ticker dict, or None if an error occurs.
+    """
+    try:
+        exchange_class = getattr(ccxt, exchange_name)
+        exchange = exchange_class()
+
+        tickers = exchange.fetch_tickers(symbols)
+        if symbols is not None:
+            wanted = set(symbols)
+            tickers = {symbol: ticker for symbol, ticker in tickers.items() if symbol in wanted}
+        return tickers
+    except AttributeError:
+        print(f"Error: Exchange '{exchange_name}' not found in ccxt.")
+        return None
+    except ccxt.NetworkError as e:
+        print(f"Network Error connecting to {exchange_name}: {e}")
+        return None
+    except ccxt.ExchangeError as e:
+        print(f"Exchange Error with {exchange_name}: {e}")
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return None
+
 if __name__ == '__main__':
     # Example usage with the default exchange (KuCoin)
     print("--- Fetching data from KuCoin (default) ---")
@@ -0,0 +1,79 @@
+import time
+
+class TickerScreener:
+    """
+    Pre-screens a symbol universe from bulk tickers so candles are only fetched for pairs worth analyzing.
+
+    A symbol passes when it is liquid enough (quote volume and bid/ask spread) and either has never
+    been analyzed, has moved by at least min_move_pct since it was last analyzed, or was last analyzed
+    more than max_stale_seconds ago.
+    """
+    def __init__(self, min_move_pct=0.5, min_quote_volume=100000, max_spread_pct=0.5, max_stale_seconds=3600):
+        """
+        :param min_move_pct: Minimum price move, in percent, since the symbol was last analyzed.
+        :param min_quote_volume: Minimum 24h volume in the quote currency.
+        :param max_spread_pct: Maximum bid/ask spread, in percent of the mid price.
+        :param max_stale_seconds: A liquid symbol is re-analyzed at least this often, even if it did not move.
+        """
+        self.min_move_pct = min_move_pct
+        self.min_quote_volume = min_quote_volume
+        self.max_spread_pct = max_spread_pct
+        self.max_stale_seconds = max_stale_seconds
+        self.last_analyzed = {}
+        self._screened_prices = {}
+
+    def is_liquid(self, ticker):
+        """
+        Checks the volume and spread thresholds. Fields the exchange does not report are not checked.
+        """
+        volume = ticker.get('quoteVolume')
+        if volume is not None and volume < self.min_quote_volume:
+            return False
+        bid, ask = ticker.get('bid'), ticker.get('ask')
+        if bid and ask:
+            spread_pct = (ask - bid) / ((ask + bid) / 2) * 100
+            if spread_pct > self.max_spread_pct:
+                return False
+        return True
+
+    def select(self, symbols, tickers, now=None):
+        """
+        :param symbols: The symbol universe.
+        :param tickers: A dict mapping symbol to ccxt ticker, as returned by fetch_tickers.
+        :param now: The current time in seconds; defaults to time.time().
+        :return: The symbols whose candles should be fetched this cycle.
+        """
+        now = time.time() if now is None else now
+        self._screened_prices = {symbol: ticker.get('last') for symbol, ticker in tickers.items()}
+        selected = []
+        for symbol in symbols:
+            ticker = tickers.get(symbol)
+            if ticker is None:
+                # Not screenable, so fall back to analyzing it
+                selected.append(symbol)
+                continue
+            if not self.is_liquid(ticker):
+                continue
+
+            previous = self.last_analyzed.get(symbol)
+            if previous is None:
+                selected.append(symbol)
+                continue
+            analyzed_at, analyzed_price = previous
+            price = ticker.get('last')
+            moved = bool(price and analyzed_price) and abs(price / analyzed_price - 1) * 100 >= self.min_move_pct
+            if moved or now - analyzed_at >= self.max_stale_seconds:
+                selected.append(symbol)
+        return selected
+
+    def mark_analyzed(self, symbol, price=None, now=None):
+        """
+        Records that a symbol was analyzed at the given price.
+
+        :param price: The live price the symbol was analyzed at. Defaults to its ticker price from the
+                      last select(), so later moves are measured between tickers and not against a
+                      candle close that may be up to one candle old.
+        """
+        if price is None:
+            price = self._screened_prices.get(symbol)
+        self.last_analyzed[symbol] = (time.time() if now is None else now, price)
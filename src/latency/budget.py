@@ -0,0 +1,121 @@
+import time
+import asyncio
+
+class LatencyBudget:
+    """
+    Deadlines for each stage of a cycle and for the cycle as a whole, with graceful degradation.
+
+    A stage that runs out of time (or fails) falls back to the last good value of its input, as long
+    as that value is not older than its staleness limit. When the remaining cycle budget gets short,
+    non-critical work is shed: Bollinger Bands first, then fresh sentiment (the last score is reused).
+    """
+    # Stages that can be shed, in the order they are given up
+    SHEDDABLE = ('bbands', 'sentiment')
+
+    def __init__(self, cycle_seconds=None, stage_seconds=None, shed_below_seconds=None, max_stale_seconds=None,
+                 clock=time.monotonic):
+        """
+        :param cycle_seconds: Deadline for a whole cycle, or None for no limit.
+        :param stage_seconds: A dict of per-stage deadlines, e.g. {'candles': 20, 'news': 15}.
+        :param shed_below_seconds: A dict mapping a sheddable stage to the remaining cycle time below
+                                   which it is skipped, e.g. {'bbands': 10, 'sentiment': 20}.
+        :param max_stale_seconds: A dict mapping an input kind ('candles', 'sentiment') to the
+                                  maximum age of a fallback value.
+        :param clock: A monotonic clock in seconds.
+        """
+        self.cycle_seconds = cycle_seconds
+        self.stage_seconds = stage_seconds or {}
+        self.shed_below_seconds = shed_below_seconds or {}
+        self.max_stale_seconds = max_stale_seconds or {}
+        self.clock = clock
+        self.last_good = {}
+        self._deadline = None
+
+    def start_cycle(self):
+        self._deadline = self.clock() + self.cycle_seconds if self.cycle_seconds is not None else None
+
+    def remaining(self):
+        """
+        :return: Seconds left in the current cycle, or None if the cycle has no deadline.
+        """
+        return self._deadline - self.clock() if self._deadline is not None else None
+
+    def timeout_for(self, stage, critical=False):
+        """
+        Returns the time a stage may take: its own deadline, capped by what is left of the cycle
+        unless the stage is critical.
+        """
+        limits = [self.stage_seconds.get(stage)]
+        if not critical:
+            limits.append(self.remaining())
+        limits = [limit for limit in limits if limit is not None]
+        return max(0.0, min(limits)) if limits else None
+
+    def should_run(self, stage):
+        """
+        Returns False if a sheddable stage should be skipped because the cycle is running out of time.
+        """
+        threshold = self.shed_below_seconds.get(stage)
+        remaining = self.remaining()
+        return threshold is None or remaining is None or remaining >= threshold
+
+    async def run(self, stage, func, *args, **kwargs):
+        """
+        Runs a blocking call in a worker thread within the stage's deadline.
+
+        A call that times out keeps running in its thread, but the cycle no longer waits for it.
+
+        :return: A (result, timed_out) tuple; result is None if the stage timed out.
+        """
+        return await self.wait(stage, asyncio.to_thread(func, *args, **kwargs))
+
+    async def wait(self, stage, awaitable, critical=False):
+        """
+        Awaits a coroutine within the stage's deadline.
+
+        :return: A (result, timed_out) tuple; result is None if the stage timed out.
+        """
+        timeout = self.timeout_for(stage, critical=critical)
+        try:
+            return await asyncio.wait_for(awaitable, timeout), False
+        except asyncio.TimeoutError:
+            print(f"Stage '{stage}' ran out of time after {timeout:.1f}s.")
+            return None, True
+
+    def remember(self, kind, key, value):
+        """
+        Stores the last good value of an input, e.g. remember('candles', 'BTC/USDT', df).
+        """
+        self.last_good[(kind, key)] = (value, self.clock())
+
+    def fallback(self, kind, key):
+        """
+        :return: A (value, age_seconds) tuple for the last good value of an input, or (None, None)
+                 if there is none or it is older than the staleness limit for its kind.
+        """
+        if (kind, key) not in self.last_good:
+            return None, None
+        value, stored_at = self.last_good[(kind, key)]
+        age = self.clock() - stored_at
+        limit = self.max_stale_seconds.get(kind)
+        if limit is not None and age > limit:
+            return None, None
+        return value, age
+
+def describe_freshness(freshness):
+    """
+    Formats the input freshness recorded with a signal, e.g. 'candles fresh, sentiment 12m old'.
+
+    :param freshness: A dict mapping an input to its age in seconds (0 for fresh), 'skipped' or 'unavailable'.
+    """
+    parts = []
+    for name, age in freshness.items():
+        if isinstance(age, str):
+            parts.append(f"{name} {age}")
+        elif age < 1:
+            parts.append(f"{name} fresh")
+        elif age < 120:
+            parts.append(f"{name} {age:.0f}s old")
+        else:
+            parts.append(f"{name} {age / 60:.0f}m old")
+    return ', '.join(parts)
@@ -1,5 +1,8 @@
 import os
 import asyncio
+import functools
+import multiprocessing
+from signal import SIGTERM
 import pandas as pd
 from dotenv import load_dotenv
 
@@ -8,12 +11,20 @@ load_dotenv(dotenv_path='D:/Jules/BotPy/botpy/.env')  # use absolute path to be
 print(os.getenv('TELEGRAM_BOT_TOKEN'))
 
 # Import functions from our modules
-from src.data_acquisition.exchange import fetch_ohlcv
-from src.technical_analysis.indicators import add_rsi, add_macd, add_bollinger_bands
-from src.trading_strategy.simple_strategy import generate_signal
+from src.data_acquisition.exchange import fetch_ohlcv, fetch_tickers, closed_candles
+from src.data_acquisition.screener import TickerScreener
+from src.technical_analysis.indicators import add_rsi, add_macd, add_bollinger_bands, indicator_cache
+from src.trading_strategy.simple_strategy import generate_signal, latest_reading
 from src.telegram_bot.bot import send_message
-from src.sentiment_analysis.news_fetcher import fetch_news_headlines
+from src.telegram_bot.commands import MarketSnapshot, build_command_application, start_command_server, stop_command_server
+from src.sentiment_analysis.news_fetcher import fetch_news_headlines, fetch_news_articles
 from src.sentiment_analysis.analyzer import SentimentAnalyzer
+from src.sentiment_analysis.cascade import LexiconScorer, format_cascade_stats
+from src.replay.recorder import CycleRecorder
+from src.state.snapshot import BotState
+from src.latency.budget import LatencyBudget, describe_freshness
+from src.workers.pool import WorkerPool, SharedAnalyzer
+from src.workers.broker import LocalBroker, serve_broker, RemoteBroker, parse_address
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
@@ -28,87 +39,453 @@ TIMEFRAME = '1h'
 NEWS_QUERY = 'Bitcoin'  # Query for fetching news articles for sentiment analysis
 DATA_LIMIT = 200
 CHECK_INTERVAL_SECONDS = 300  # 5 minutes
+# --- Sharded mode: set BOTPY_WORKERS > 0 to analyze SYMBOLS across worker processes ---
+SYMBOLS = os.getenv("BOTPY_SYMBOLS", SYMBOL).split(',')
+WORKER_COUNT = int(os.getenv("BOTPY_WORKERS", "0"))
+BROKER_ADDRESS = os.getenv("BOTPY_BROKER_ADDRESS")  # e.g. '0.0.0.0:50000' to accept remote workers
+BROKER_AUTHKEY = os.getenv("BOTPY_BROKER_AUTHKEY", "")  # Required with a broker, e.g. from `openssl rand -hex 32`
+REMOTE_WORKERS = [w for w in os.getenv("BOTPY_REMOTE_WORKERS", "").split(',') if w]
+# Optional per-base-currency news queries, e.g. 'ETH=Ethereum,SOL=Solana'; other symbols use NEWS_QUERY
+NEWS_QUERIES = dict(q.split('=', 1) for q in os.getenv("BOTPY_NEWS_QUERIES", "").split(',') if '=' in q)
+SHARD_TIMEOUT_SECONDS = 120
+# Load the model once in the coordinator and share its weights copy-on-write with forked workers
+SHARE_MODEL_MEMORY = os.getenv("BOTPY_SHARE_MODEL") == "1"
+# Bulk ticker pre-screening (sharded mode): only pairs that pass get candles fetched each cycle
+SCREENING_ENABLED = os.getenv("BOTPY_SCREEN") == "1"
+SCREEN_MIN_MOVE_PCT = 0.5  # Price move since the pair was last analyzed
+SCREEN_MIN_QUOTE_VOLUME = 100000  # 24h volume in the quote currency
+SCREEN_MAX_SPREAD_PCT = 0.5
+SCREEN_MAX_STALE_SECONDS = 3600  # Liquid pairs are re-analyzed at least this often
+RECORD_PATH = os.getenv("BOTPY_RECORD_PATH")  # e.g. 'cycles.jsonl.gz' to record every cycle for replay
+# --- Warm restarts: set BOTPY_SNAPSHOT_PATH to persist runtime state across restarts ---
+SNAPSHOT_PATH = os.getenv("BOTPY_SNAPSHOT_PATH")  # e.g. 'botpy.snapshot'
+SNAPSHOT_INTERVAL_SECONDS = 600
+HEADLINE_CACHE_SIZE = 5000  # Scored headlines remembered so they skip the model next time
+# --- Sentiment cascade: set BOTPY_SENTIMENT_CASCADE=1 to score clear-cut headlines with a finance lexicon ---
+SENTIMENT_CASCADE = os.getenv("BOTPY_SENTIMENT_CASCADE") == "1"
+# Lexicon confidence needed to skip FinBERT; lower sends fewer headlines to the model
+CASCADE_CONFIDENCE_CUTOFF = float(os.getenv("BOTPY_CASCADE_CUTOFF", "0.6"))
+# --- Latency budget: bounds a cycle's duration under partial outages ---
+CYCLE_BUDGET_SECONDS = 60
+STAGE_BUDGET_SECONDS = {'candles': 20, 'news': 15, 'sentiment': 20, 'alert': 10}
+# Non-critical work is shed when less than this much of the cycle budget remains
+SHED_BELOW_SECONDS = {'bbands': 10, 'sentiment': 25}
+# Oldest fallback input that may still be used when a stage times out or fails
+MAX_STALE_SECONDS = {'candles': 2 * 3600, 'sentiment': 6 * 3600}
+# --- Chat commands: set BOTPY_COMMANDS=1 to answer /signal, /rsi, /sentiment and /top ---
+COMMANDS_ENABLED = os.getenv("BOTPY_COMMANDS") == "1"
 
-async def check_for_signals(analyzer, news_api_key):
+def analyzer_options():
+    """
+    :return: The keyword arguments every SentimentAnalyzer in the bot is built with.
+    """
+    options = {'cache_size': HEADLINE_CACHE_SIZE}
+    if SENTIMENT_CASCADE:
+        options.update(fast_tiers=[LexiconScorer()], confidence_cutoff=CASCADE_CONFIDENCE_CUTOFF)
+    return options
+
+def format_signal_message(symbol, signal, price, sentiment_score, timeframe, freshness=None):
+    """
+    Builds the Telegram alert text for a trading signal.
+
+    :param price: The close of the last closed candle the signal was generated on.
+
+    :param freshness: Optional input freshness recorded with the signal (see describe_freshness).
+    """
+    message = f"""
+🚨 Trading Signal Alert 🚨
+
+Symbol: {symbol}
+Signal: {signal.upper()}
+Candle Close: ${price:,.2f}
+Sentiment Score: {sentiment_score:.3f}
+Timeframe: {timeframe}
+"""
+    if freshness:
+        message += f"Inputs: {describe_freshness(freshness)}\n"
+    return message
+
+async def check_for_signals(analyzer, news_api_key, recorder=None, state=None, snapshot=None, budget=None,
+                            settings=None, services=None):
     """
     The main logic loop for the trading bot.
     Fetches data, analyzes it, and sends a signal if necessary.
+
+    :param analyzer: A SentimentAnalyzer (or any object with analyze_sentiment).
+    :param news_api_key: Your NewsAPI API key.
+    :param recorder: An optional CycleRecorder that logs this cycle's inputs and outputs for replay.
+    :param state: An optional BotState; when given, only new candles and articles are fetched
+                  and an alert is not repeated for the same candle.
+    :param snapshot: An optional MarketSnapshot that receives this cycle's readings for chat commands.
+    :param budget: An optional LatencyBudget with stage and cycle deadlines. Without one, stages
+                   have no time limit.
+    :param settings: An optional dict overriding exchange_name, symbol, timeframe, news_query or limit
+                     (defaults: EXCHANGE_NAME, SYMBOL, TIMEFRAME, NEWS_QUERY, DATA_LIMIT).
+    :param services: An optional object providing stand-ins for fetch_ohlcv, fetch_news_headlines,
+                     fetch_news_articles, send_message, telegram_token or telegram_chat_id, e.g. for replays.
+                     Anything it does not provide uses the live service.
+    :return: The generated signal ('buy', 'sell' or 'hold'), or None if the check was skipped.
     """
-    print(f"--- Checking for signals for {SYMBOL} on {EXCHANGE_NAME.capitalize()} at {pd.Timestamp.now()} ---")
+    settings = settings or {}
+    exchange_name = settings.get('exchange_name', EXCHANGE_NAME)
+    symbol = settings.get('symbol', SYMBOL)
+    timeframe = settings.get('timeframe', TIMEFRAME)
+    news_query = settings.get('news_query', NEWS_QUERY)
+    limit = settings.get('limit', DATA_LIMIT)
+    fetch_candles = getattr(services, 'fetch_ohlcv', fetch_ohlcv)
+    fetch_headlines = getattr(services, 'fetch_news_headlines', fetch_news_headlines)
+    fetch_articles = getattr(services, 'fetch_news_articles', fetch_news_articles)
+    send_alert = getattr(services, 'send_message', send_message)
+
+    print(f"--- Checking for signals for {symbol} on {exchange_name.capitalize()} at {pd.Timestamp.now()} ---")
+    budget = budget or LatencyBudget()
+    budget.start_cycle()
+    freshness = {}
+    if recorder is not None:
+        recorder.start_cycle(exchange_name, symbol, timeframe)
+
+    # Network calls and model inference run in worker threads so the event loop
+    # (and with it the chat command server) stays responsive during a cycle.
 
     # 1. Fetch Market Data
-    market_data = fetch_ohlcv(exchange_name=EXCHANGE_NAME, symbol=SYMBOL, timeframe=TIMEFRAME, limit=DATA_LIMIT)
+    since = state.candles_since(exchange_name, symbol, timeframe, limit) if state is not None else None
+    market_data, _ = await budget.run('candles', fetch_candles, exchange_name=exchange_name, symbol=symbol,
+                                      timeframe=timeframe, limit=limit, since=since)
+    if state is not None:
+        market_data = state.merge_candles(exchange_name, symbol, timeframe, market_data, limit)
+    if market_data is not None and not market_data.empty:
+        # Signals use closed candles only, so they do not repaint and indicators are cached between polls.
+        # The open candle is dropped before the frame is kept as a fallback, so a partial candle is never
+        # reused after it closes.
+        market_data = closed_candles(market_data)
+        budget.remember('candles', symbol, market_data.copy())
+        freshness['candles'] = 0.0
+    else:
+        market_data, age = budget.fallback('candles', symbol)
+        if market_data is not None:
+            print(f"Using candles from {age:.0f}s ago.")
+            market_data = market_data.copy()
+            freshness['candles'] = age
+    if recorder is not None:
+        recorder.record_candles(market_data)
     if market_data is None or market_data.empty:
         print("Could not fetch market data. Skipping this check.")
-        return
+        if recorder is not None:
+            recorder.end_cycle(None)
+        return None
 
     # 2. Fetch and Analyze News Sentiment
-    print(f"Fetching news for '{NEWS_QUERY}'...")
-    headlines = fetch_news_headlines(api_key=news_api_key, query=NEWS_QUERY)
-    if not headlines:
-        print("Could not fetch news headlines. Proceeding without sentiment.")
-        sentiment_score = 0.0 # Neutral sentiment if no news
+    headlines = []
+    sentiment_score = None
+    if not budget.should_run('sentiment'):
+        print("Cycle is short on time. Skipping fresh sentiment.")
     else:
-        sentiment_score = analyzer.analyze_sentiment(headlines)
-        print(f"Calculated sentiment score: {sentiment_score:.3f}")
+        print(f"Fetching news for '{news_query}'...")
+        if state is not None:
+            articles, news_timed_out = await budget.run('news', fetch_articles, api_key=news_api_key,
+                                                        query=news_query, from_param=state.news_cursor(news_query))
+            if not news_timed_out:
+                headlines = state.merge_articles(news_query, articles)
+        else:
+            headlines, news_timed_out = await budget.run('news', fetch_headlines, api_key=news_api_key,
+                                                         query=news_query)
+        if news_timed_out:
+            headlines = []
+        elif not headlines:
+            # fetch_news_headlines returns [] on errors too, so fall back like on a timeout
+            print("Could not fetch news headlines.")
+        else:
+            sentiment_score, _ = await budget.run('sentiment', analyzer.analyze_sentiment, headlines)
+            if sentiment_score is not None:
+                budget.remember('sentiment', news_query, sentiment_score)
+                freshness['sentiment'] = 0.0
+                print(f"Calculated sentiment score: {sentiment_score:.3f}")
+    if sentiment_score is None:
+        sentiment_score, age = budget.fallback('sentiment', news_query)
+        if sentiment_score is not None:
+            print(f"Using sentiment score from {age:.0f}s ago: {sentiment_score:.3f}")
+            freshness['sentiment'] = age
+        else:
+            print("No recent sentiment score. Proceeding with neutral sentiment.")
+            sentiment_score = 0.0 # Neutral sentiment if no news
+            freshness['sentiment'] = 'unavailable'
+    if recorder is not None:
+        recorder.record_sentiment(news_query, headlines or [], sentiment_score, freshness['sentiment'])
 
     # 3. Calculate Technical Indicators
     add_rsi(market_data)
     add_macd(market_data)
-    add_bollinger_bands(market_data)
+    if budget.should_run('bbands'):
+        add_bollinger_bands(market_data)
+    else:
+        # Bollinger Bands are informational only; generate_signal does not use them
+        freshness['bbands'] = 'skipped'
 
     # 4. Generate Signal using both technicals and sentiment
     signal = generate_signal(market_data, sentiment_score)
-    print(f"Generated signal: {signal.upper()}")
+    print(f"Generated signal: {signal.upper()} (inputs: {describe_freshness(freshness)})")
+    if snapshot is not None:
+        snapshot.publish({symbol: dict(latest_reading(market_data, signal, sentiment_score), freshness=freshness)})
 
     # 5. Send Telegram Alert
     if signal in ['buy', 'sell']:
-        token = os.environ.get('TELEGRAM_BOT_TOKEN')
-        chat_id = os.environ.get('TELEGRAM_CHAT_ID')
+        latest_price = market_data['close'].iloc[-1]
+        message = format_signal_message(symbol, signal, latest_price, sentiment_score, timeframe, freshness)
+        if recorder is not None:
+            recorder.record_message(message)
 
-        if not token or not chat_id:
+        token = getattr(services, 'telegram_token', TELEGRAM_BOT_TOKEN)
+        chat_id = getattr(services, 'telegram_chat_id', TELEGRAM_CHAT_ID)
+        candle_time = str(market_data.index[-1])
+        if state is not None and not state.is_new_alert(symbol, signal, candle_time):
+            print(f"Already sent a {signal.upper()} alert for the {candle_time} candle. Skipping.")
+        elif not token or not chat_id:
             print("Telegram credentials not found. Cannot send alert.")
-            return
+        else:
+            # Alerts are never shed, so only the alert's own deadline applies
+            sent, _ = await budget.wait('alert', send_alert(token, chat_id, message), critical=True)
+            if sent and state is not None:
+                state.record_alert(symbol, signal, candle_time)
+                # Persist right away, so a restart before the next periodic save does not repeat the alert
+                if SNAPSHOT_PATH:
+                    state.save(SNAPSHOT_PATH)
+    else:
+        print("Signal is 'hold'. No action required.")
 
-        latest_price = market_data['close'].iloc[-1]
-        message = f"""
-🚨 Trading Signal Alert 🚨
+    if recorder is not None:
+        recorder.end_cycle(signal)
+    return signal
 
-Symbol: {SYMBOL}
-Signal: {signal.upper()}
-Price: ${latest_price:,.2f}
-Sentiment Score: {sentiment_score:.3f}
-Timeframe: {TIMEFRAME}
-"""
-        await send_message(token, chat_id, message)
+
+async def screen_symbols(screener):
+    """
+    Pre-screens SYMBOLS with one bulk ticker request.
+
+    :return: The symbols to analyze this cycle; all of them if the tickers could not be fetched.
+    """
+    tickers = await asyncio.to_thread(fetch_tickers, EXCHANGE_NAME, SYMBOLS)
+    if tickers is None:
+        print("Could not fetch tickers. Analyzing the full universe.")
+        return SYMBOLS
+    selected = screener.select(SYMBOLS, tickers)
+    print(f"Screening passed {len(selected)}/{len(SYMBOLS)} symbols.")
+    return selected
+
+async def fetch_headlines_by_query(queries, news_api_key, state=None):
+    """
+    Fetches the headlines of each news query once.
+
+    :param queries: The distinct news queries of this cycle.
+    :param news_api_key: The NewsAPI key.
+    :param state: An optional BotState; when given, only new articles are fetched.
+    :return: A dict mapping each query to its headlines (empty if the fetch failed).
+    """
+    headlines_by_query = {}
+    for query in queries:
+        print(f"Fetching news for '{query}'...")
+        if state is not None:
+            articles = await asyncio.to_thread(fetch_news_articles, api_key=news_api_key, query=query,
+                                               from_param=state.news_cursor(query))
+            headlines_by_query[query] = state.merge_articles(query, articles)
+        else:
+            headlines_by_query[query] = await asyncio.to_thread(fetch_news_headlines, api_key=news_api_key,
+                                                                query=query)
+    return headlines_by_query
+
+async def check_sharded(pool, news_api_key, state=None, snapshot=None, screener=None):
+    """
+    Runs one cycle across the worker pool and sends alerts for its signals from this single notifier.
+
+    News is fetched here once per distinct query and scored once by the pool, so workers never call NewsAPI.
+
+    :param pool: A started WorkerPool.
+    :param news_api_key: The NewsAPI key.
+    :param state: An optional BotState used to avoid repeating an alert for the same candle.
+    :param snapshot: An optional MarketSnapshot that receives this cycle's readings for chat commands.
+    :param screener: An optional TickerScreener; when given, only symbols that pass are analyzed.
+    :return: The list of per-symbol results.
+    """
+    print(f"--- Checking {len(SYMBOLS)} symbols on {EXCHANGE_NAME.capitalize()} at {pd.Timestamp.now()} ---")
+    symbols = await screen_symbols(screener) if screener is not None else SYMBOLS
+    if not symbols:
+        return []
+
+    queries = dict.fromkeys(pool.news_queries(symbols).values())
+    headlines_by_query = await fetch_headlines_by_query(queries, news_api_key, state=state)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = await loop.run_in_executor(None, pool.run_cycle, symbols, headlines_by_query)
+    print(f"Analyzed {len(results)}/{len(symbols)} symbols in {loop.time() - started:.1f}s")
+    if screener is not None:
+        for result in results:
+            screener.mark_analyzed(result['symbol'])
+    for line in pool.memory_report():
+        print(f"Memory {line}")
+    if snapshot is not None:
+        snapshot.publish({result['symbol']: result for result in results})
+
+    for result in results:
+        if result['signal'] not in ['buy', 'sell']:
+            continue
+        print(f"Generated signal for {result['symbol']}: {result['signal'].upper()}")
+        if state is not None and not state.is_new_alert(result['symbol'], result['signal'], result['timestamp']):
+            print(f"Already sent this alert for the {result['timestamp']} candle. Skipping.")
+            continue
+        if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
+            print("Telegram credentials not found. Cannot send alert.")
+            continue
+        message = format_signal_message(result['symbol'], result['signal'], result['price'],
+                                        result['sentiment'], TIMEFRAME)
+        sent = await send_message(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, message)
+        if sent and state is not None:
+            state.record_alert(result['symbol'], result['signal'], result['timestamp'])
+            if SNAPSHOT_PATH:
+                state.save(SNAPSHOT_PATH)
+    return results
+
+async def run_sharded(news_api_key, snapshot=None):
+    """
+    Runs the bot as a coordinator over local (and optionally remote) worker processes.
+    """
+    if (BROKER_ADDRESS or REMOTE_WORKERS) and not BROKER_AUTHKEY:
+        # The broker unpickles whatever it receives, so anyone reaching it without a key could run code here
+        print("BOTPY_BROKER_AUTHKEY must be set to a long random secret to use a broker. The bot cannot run.")
+        return
+    settings = {
+        'exchange_name': EXCHANGE_NAME,
+        'timeframe': TIMEFRAME,
+        'limit': DATA_LIMIT,
+        'news_query': NEWS_QUERY,
+        'news_queries': NEWS_QUERIES,
+        # Workers keep their candles and scored headlines in per-worker snapshots; articles are
+        # fetched by the coordinator and kept in its own snapshot
+        'snapshot_path': SNAPSHOT_PATH,
+    }
+    analyzer_factory = functools.partial(SentimentAnalyzer, **analyzer_options())
+    context = multiprocessing.get_context()
+    if SHARE_MODEL_MEMORY and WORKER_COUNT > 0:
+        print("Initializing sentiment analyzer once for all workers (this may take a moment)...")
+        analyzer = SentimentAnalyzer(**analyzer_options())
+        if not analyzer.model:
+            print("Failed to load sentiment model. The bot cannot run.")
+            return
+        analyzer_factory = SharedAnalyzer(analyzer, torch_threads=max(1, (os.cpu_count() or 1) // WORKER_COUNT))
+        context = multiprocessing.get_context('fork')
+
+    state = BotState.load(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+    screener = None
+    if SCREENING_ENABLED:
+        screener = TickerScreener(min_move_pct=SCREEN_MIN_MOVE_PCT, min_quote_volume=SCREEN_MIN_QUOTE_VOLUME,
+                                  max_spread_pct=SCREEN_MAX_SPREAD_PCT, max_stale_seconds=SCREEN_MAX_STALE_SECONDS)
+    broker_server = None
+    if BROKER_ADDRESS:
+        address = parse_address(BROKER_ADDRESS)
+        broker_server = serve_broker(address, BROKER_AUTHKEY.encode())
+        broker = RemoteBroker(address, BROKER_AUTHKEY.encode())
+        print(f"Broker listening on {BROKER_ADDRESS}")
     else:
-        print("Signal is 'hold'. No action required.")
+        broker = LocalBroker(context)
 
+    pool = WorkerPool(WORKER_COUNT, settings, broker=broker, remote_workers=REMOTE_WORKERS,
+                      shard_timeout=SHARD_TIMEOUT_SECONDS, analyzer_factory=analyzer_factory, context=context)
+    pool.start()
+    try:
+        while True:
+            try:
+                await check_sharded(pool, news_api_key, state=state, snapshot=snapshot, screener=screener)
+                if state is not None:
+                    state.save(SNAPSHOT_PATH)
+            except Exception as e:
+                print(f"An error occurred in the main loop: {e}")
+
+            print(f"Waiting for {CHECK_INTERVAL_SECONDS} seconds...")
+            await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+    finally:
+        pool.stop()
+        if broker_server is not None:
+            broker_server.shutdown()
+        if state is not None:
+            state.save(SNAPSHOT_PATH)
 
 async def main():
     """
     The main entry point for the bot. Initializes modules and runs the loop.
     """
+    news_api_key = os.environ.get("NEWS_API_KEY")
+    if not news_api_key:
+        print("NEWS_API_KEY not found in environment variables. The bot cannot run.")
+        return
+
+    # Deploys stop the bot with SIGTERM; cancelling the main task lets every finally block (and
+    # with it the final snapshot save) run. Not available on Windows, where Ctrl+C does the same.
+    try:
+        asyncio.get_running_loop().add_signal_handler(SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError):
+        pass
+
+    snapshot = MarketSnapshot()
+    command_server = None
+    if COMMANDS_ENABLED and TELEGRAM_BOT_TOKEN:
+        command_server = build_command_application(TELEGRAM_BOT_TOKEN, snapshot)
+        await start_command_server(command_server)
+    try:
+        await run_bot(news_api_key, snapshot)
+    except asyncio.CancelledError:
+        print("Bot stopped.")
+    finally:
+        if command_server is not None:
+            await stop_command_server(command_server)
+
+async def run_bot(news_api_key, snapshot):
+    """
+    Runs the scan loop, in a single process or across a worker pool.
+    """
+    if WORKER_COUNT > 0 or REMOTE_WORKERS:
+        # Each worker loads its own sentiment model, or with BOTPY_SHARE_MODEL=1 local workers are forked
+        # from one model loaded here and share its weights.
+        await run_sharded(news_api_key, snapshot=snapshot)
+        return
+
     print("Initializing sentiment analyzer (this may take a moment)...")
-    analyzer = SentimentAnalyzer()
+    analyzer = SentimentAnalyzer(**analyzer_options())
     if not analyzer.model:
         print("Failed to load sentiment model. The bot cannot run.")
         return
 
-    news_api_key = os.environ.get("NEWS_API_KEY")
-    if not news_api_key:
-        print("NEWS_API_KEY not found in environment variables. The bot cannot run.")
-        return
+    recorder = CycleRecorder(RECORD_PATH) if RECORD_PATH else None
+    if recorder is not None:
+        print(f"Recording every cycle to {RECORD_PATH}")
+
+    state = BotState.load(SNAPSHOT_PATH, analyzer) if SNAPSHOT_PATH else None
+    budget = LatencyBudget(cycle_seconds=CYCLE_BUDGET_SECONDS, stage_seconds=STAGE_BUDGET_SECONDS,
+                           shed_below_seconds=SHED_BELOW_SECONDS, max_stale_seconds=MAX_STALE_SECONDS)
+    loop = asyncio.get_running_loop()
+    last_snapshot = loop.time()
 
     print("Starting trading bot...")
-    while True:
-        try:
-            await check_for_signals(analyzer, news_api_key)
-        except Exception as e:
-            print(f"An error occurred in the main loop: {e}")
-
-        print(f"Waiting for {CHECK_INTERVAL_SECONDS} seconds...")
-        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+    try:
+        while True:
+            try:
+                await check_for_signals(analyzer, news_api_key, recorder=recorder, state=state, snapshot=snapshot,
+                                        budget=budget)
+            except Exception as e:
+                print(f"An error occurred in the main loop: {e}")
+            stats = indicator_cache.stats()
+            print(f"Indicator cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+            if analyzer.cascade:
+                for line in format_cascade_stats(analyzer.cascade.stats()):
+                    print(f"Sentiment cascade {line}")
+
+            if state is not None and loop.time() - last_snapshot >= SNAPSHOT_INTERVAL_SECONDS:
+                state.save(SNAPSHOT_PATH, analyzer)
+                last_snapshot = loop.time()
+
+            print(f"Waiting for {CHECK_INTERVAL_SECONDS} seconds...")
+            await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+    finally:
+        if state is not None:
+            state.save(SNAPSHOT_PATH, analyzer)
 
 if __name__ == '__main__':
     print("Trading Bot Main Script")
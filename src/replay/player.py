@@ -0,0 +1,139 @@
+import asyncio
+import sys
+import time
+
+import src.main as pipeline
+from src.data_acquisition.exchange import ohlcv_to_dataframe
+from src.latency.budget import LatencyBudget
+from src.replay.recorder import read_cycles
+
+class ReplayServices:
+    """
+    Local stand-ins for ccxt, NewsAPI, FinBERT and Telegram that serve one recorded cycle at a time.
+
+    An instance is passed to check_for_signals both as the analyzer and as its services.
+    """
+    telegram_token = 'replay'
+    telegram_chat_id = 'replay'
+
+    def __init__(self):
+        self.cycle = None
+        self.sent_messages = []
+
+    def load(self, cycle):
+        self.cycle = cycle
+        self.sent_messages = []
+
+    def fetch_ohlcv(self, exchange_name='kucoin', symbol='BTC/USDT', timeframe='1h', limit=100, since=None):
+        candles = self.cycle['candles']
+        if not candles:
+            return None
+        return ohlcv_to_dataframe(candles)
+
+    def fetch_news_headlines(self, api_key, query, page_size=100, language='en'):
+        return list(self.cycle['headlines'])
+
+    def analyze_sentiment(self, headlines):
+        return self.cycle['sentiment'] if self.cycle['sentiment'] is not None else 0.0
+
+    def budget(self):
+        """
+        Returns a LatencyBudget for the cycle without deadlines. If the live run fell back to an
+        earlier sentiment score (news failed, timed out or was shed), that score is the budget's
+        fallback, so the replay reaches the same score instead of neutral sentiment.
+        """
+        budget = LatencyBudget()
+        freshness = self.cycle.get('sentiment_freshness')
+        if isinstance(freshness, (int, float)) and freshness > 0 and self.cycle['sentiment'] is not None:
+            budget.remember('sentiment', self.cycle['query'], self.cycle['sentiment'])
+        return budget
+
+    async def send_message(self, token, chat_id, text):
+        self.sent_messages.append(text)
+        return True
+
+def _without_freshness(messages):
+    # The 'Inputs:' line reports how old the inputs were, which depends on when the live run
+    # fetched them and can never match a replay
+    return ['\n'.join(line for line in message.splitlines() if not line.startswith('Inputs:'))
+            for message in messages]
+
+async def replay_log(path, speed=None):
+    """
+    Feeds a recorded log back through check_for_signals and checks the signals and alert messages
+    match the recording (ignoring the input freshness line of each message).
+
+    :param path: Path to a log written by CycleRecorder.
+    :param speed: Replay pace as a multiple of the recorded wall-clock time (e.g. 60 for 60x).
+                  None replays as fast as possible.
+    :return: A dict with the cycle count, throughput, speedup and any mismatched cycles.
+    """
+    services = ReplayServices()
+    mismatches = []
+    cycles = 0
+    first_recorded_at = last_recorded_at = None
+
+    started = time.perf_counter()
+    for cycle in read_cycles(path):
+        recorded_at = cycle['started_at']
+        if first_recorded_at is None:
+            first_recorded_at = recorded_at
+        elif speed:
+            delay = (recorded_at - first_recorded_at) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        last_recorded_at = recorded_at
+
+        services.load(cycle)
+        settings = {'exchange_name': cycle['exchange'], 'symbol': cycle['symbol'], 'timeframe': cycle['timeframe'],
+                    'news_query': cycle['query'] or pipeline.NEWS_QUERY}
+        signal = await pipeline.check_for_signals(services, news_api_key='replay', budget=services.budget(),
+                                                  settings=settings, services=services)
+
+        recorded_messages = _without_freshness(cycle['messages'])
+        replayed_messages = _without_freshness(services.sent_messages)
+        if signal != cycle['signal'] or replayed_messages != recorded_messages:
+            mismatches.append({
+                'cycle': cycles,
+                'symbol': cycle['symbol'],
+                'recorded': cycle['signal'],
+                'replayed': signal,
+                'recorded_messages': recorded_messages,
+                'replayed_messages': replayed_messages,
+            })
+        cycles += 1
+    elapsed = time.perf_counter() - started
+
+    recorded_span = (last_recorded_at - first_recorded_at) if cycles else 0.0
+    return {
+        'cycles': cycles,
+        'elapsed_seconds': elapsed,
+        'cycles_per_second': cycles / elapsed if elapsed > 0 else 0.0,
+        'recorded_span_seconds': recorded_span,
+        'speedup': recorded_span / elapsed if elapsed > 0 else 0.0,
+        'mismatches': mismatches,
+    }
+
+if __name__ == '__main__':
+    # Example usage:
+    # BOTPY_RECORD_PATH=cycles.jsonl.gz python3 src/main.py   (record)
+    # python3 -m src.replay.player cycles.jsonl.gz [speed]   (replay)
+    if len(sys.argv) < 2:
+        print("Usage: python3 -m src.replay.player <log path> [speed]")
+        sys.exit(1)
+
+    replay_speed = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    report = asyncio.run(replay_log(sys.argv[1], speed=replay_speed))
+
+    print(f"Replayed {report['cycles']} cycles in {report['elapsed_seconds']:.2f}s "
+          f"({report['cycles_per_second']:.1f} cycles/s, {report['speedup']:.0f}x real time)")
+    if report['mismatches']:
+        print(f"{len(report['mismatches'])} cycles did not match the recording:")
+        for mismatch in report['mismatches']:
+            print(f"  cycle {mismatch['cycle']} {mismatch['symbol']}: "
+                  f"recorded {mismatch['recorded']}, replayed {mismatch['replayed']}")
+            if mismatch['recorded_messages'] != mismatch['replayed_messages']:
+                print(f"    alert messages differ: recorded {mismatch['recorded_messages']}, "
+                      f"replayed {mismatch['replayed_messages']}")
+        sys.exit(1)
+    print("All replayed signals and alerts match the recording.")
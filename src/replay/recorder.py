@@ -0,0 +1,87 @@
+import gzip
+import json
+import time
+
+from src.data_acquisition.exchange import dataframe_to_ohlcv
+
+def open_log(path, mode='r'):
+    """
+    Opens a cycle log as text, transparently gzip-compressing files ending in '.gz'.
+
+    :param path: Path to the log file.
+    :param mode: 'r' to read, 'a' to append or 'w' to overwrite.
+    :return: A text file object.
+    """
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+class CycleRecorder:
+    """
+    Records every external input and output of a pipeline cycle to a compact JSON-lines log.
+
+    Each line holds one cycle: the raw candles returned by the exchange, the news headlines,
+    the sentiment score produced by the model, the generated signal and any alert messages.
+    The log can be fed back through the pipeline with src.replay.player.
+    """
+    def __init__(self, path):
+        """
+        :param path: Path of the log file. Cycles are appended; a '.gz' suffix enables compression.
+        """
+        self.path = path
+        self._cycle = None
+
+    def start_cycle(self, exchange_name, symbol, timeframe):
+        self._cycle = {
+            'started_at': time.time(),
+            'exchange': exchange_name,
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'candles': None,
+            'query': None,
+            'headlines': [],
+            'sentiment': None,
+            'sentiment_freshness': None,
+            'signal': None,
+            'messages': [],
+        }
+
+    def record_candles(self, df):
+        if df is not None:
+            self._cycle['candles'] = dataframe_to_ohlcv(df)
+
+    def record_sentiment(self, query, headlines, sentiment_score, freshness=0.0):
+        """
+        :param freshness: 0.0 if the score was computed from `headlines` this cycle, the age in seconds
+                          of a fallback score, or 'unavailable' if neutral sentiment was used.
+        """
+        self._cycle['query'] = query
+        self._cycle['headlines'] = list(headlines or [])
+        self._cycle['sentiment'] = float(sentiment_score)
+        self._cycle['sentiment_freshness'] = freshness
+
+    def record_message(self, text):
+        self._cycle['messages'].append(text)
+
+    def end_cycle(self, signal):
+        """
+        Stores the cycle's signal and appends the finished cycle to the log.
+        """
+        self._cycle['signal'] = signal
+        try:
+            with open_log(self.path, 'a') as f:
+                f.write(json.dumps(self._cycle, separators=(',', ':')) + '\n')
+        except OSError as e:
+            print(f"Error writing cycle log {self.path}: {e}")
+        self._cycle = None
+
+def read_cycles(path):
+    """
+    Yields the recorded cycles of a log file in order.
+
+    :param path: Path to a log written by CycleRecorder.
+    """
+    with open_log(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
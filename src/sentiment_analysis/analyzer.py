@@ -1,15 +1,30 @@
+from collections import OrderedDict
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
 
+from src.sentiment_analysis.cascade import SentimentCascade
+
 class SentimentAnalyzer:
     """
     A class to analyze the sentiment of financial news headlines using a pre-trained model.
     """
-    def __init__(self, model_name='ProsusAI/finbert'):
+    name = 'finbert'
+
+    def __init__(self, model_name='ProsusAI/finbert', cache_size=0, fast_tiers=(), confidence_cutoff=0.6):
         """
         Initializes the tokenizer and model.
         This can take some time as it might need to download the model.
+
+        :param model_name: The Hugging Face model to load.
+        :param cache_size: How many per-headline scores to remember, so repeated headlines
+                           skip the model. 0 disables the cache.
+        :param fast_tiers: Cheaper scorers (e.g. a LexiconScorer) tried in order before the model.
+                           Only headlines they score below `confidence_cutoff` reach the model.
+        :param confidence_cutoff: The confidence a fast tier needs for its score to be used.
         """
+        self.cache_size = cache_size
+        self.score_cache = OrderedDict()
+        self.cascade = SentimentCascade(fast_tiers, self, confidence_cutoff) if fast_tiers else None
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
             self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
@@ -31,6 +46,39 @@ class SentimentAnalyzer:
         if not self.model or not self.tokenizer or not headlines:
             return 0.0
 
+        if not self.cache_size:
+            scores = self._score_headlines(headlines)
+            return sum(scores) / len(scores) if scores else 0.0
+
+        # Only headlines that have not been scored before go through the model
+        new_headlines = [h for h in dict.fromkeys(headlines) if h not in self.score_cache]
+        if new_headlines:
+            new_scores = self._score_headlines(new_headlines)
+            if not new_scores:
+                return 0.0
+            self.score_cache.update(zip(new_headlines, new_scores))
+
+        scores = []
+        for headline in headlines:
+            self.score_cache.move_to_end(headline)
+            scores.append(self.score_cache[headline])
+        while len(self.score_cache) > self.cache_size:
+            self.score_cache.popitem(last=False)
+
+        # Calculate the average score across all headlines
+        return sum(scores) / len(scores)
+
+    def predict_probabilities(self, headlines):
+        """
+        Runs the model over a batch of headlines.
+
+        :param headlines: A list of strings (news headlines).
+        :return: A list of (positive, negative, neutral) probability tuples, one per headline,
+                 or an empty list if the model isn't loaded or an error occurs.
+        """
+        if not self.model or not self.tokenizer or not headlines:
+            return []
+
         try:
             # Tokenize the headlines. It's better to process them in a batch.
             inputs = self.tokenizer(headlines, padding=True, truncation=True, return_tensors='pt', max_length=512)
@@ -40,21 +88,35 @@ class SentimentAnalyzer:
                 outputs = self.model(**inputs)
 
             # Convert logits to probabilities
+            # The model's label mapping is: 0 -> positive, 1 -> negative, 2 -> neutral
             predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
+            return [tuple(row) for row in predictions.tolist()]
 
-            # The model's label mapping is: 0 -> positive, 1 -> negative, 2 -> neutral
-            # We calculate a score for each headline: positive_prob - negative_prob
-            # This gives a score from -1 to 1 for each headline
-            sentiment_scores = predictions[:, 0] - predictions[:, 1]
+        except Exception as e:
+            print(f"An error occurred during sentiment analysis: {e}")
+            return []
+
+    def score(self, headlines):
+        """
+        Scores a batch of headlines with the model alone, so the analyzer can act as a cascade tier.
 
-            # Calculate the average score across all headlines
-            average_score = sentiment_scores.mean().item()
+        :return: A list of (score, confidence) tuples, where confidence is the top class probability,
+                 or an empty list on error.
+        """
+        return [(positive - negative, max(positive, negative, neutral))
+                for positive, negative, neutral in self.predict_probabilities(headlines)]
 
-            return average_score
+    def _score_headlines(self, headlines):
+        """
+        Scores a batch of headlines, through the cascade if fast tiers are configured.
 
-        except Exception as e:
-            print(f"An error occurred during sentiment analysis: {e}")
-            return 0.0
+        :return: A list with one score between -1 and 1 per headline, or an empty list on error.
+        """
+        if self.cascade:
+            return self.cascade.score(headlines)
+        # We calculate a score for each headline: positive_prob - negative_prob
+        # This gives a score from -1 to 1 for each headline
+        return [positive - negative for positive, negative, _ in self.predict_probabilities(headlines)]
 
 if __name__ == '__main__':
     # This block will run on first import and may download the model.
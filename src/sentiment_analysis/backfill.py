@@ -0,0 +1,197 @@
+import os
+import csv
+import json
+import argparse
+import itertools
+import multiprocessing
+from collections import deque
+
+import pandas as pd
+
+from src.sentiment_analysis.analyzer import SentimentAnalyzer
+
+CHECKPOINT_FILE = '_checkpoint.json'
+
+# The analyzer used by backfill workers. It is set in the parent before the pool is forked,
+# so every worker shares the loaded weights copy-on-write.
+_backfill_analyzer = None
+
+def read_articles(path, title_field='title', time_field='publishedAt'):
+    """
+    Streams articles from a JSONL or CSV dump without loading it into memory.
+
+    :param path: A '.jsonl' / '.json' (one object per line) or '.csv' file.
+    :param title_field: The field holding the headline.
+    :param time_field: The field holding the publish time.
+    :return: A generator of (published_at, title) tuples.
+    """
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield row.get(time_field), row.get(title_field) or ''
+    else:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    article = json.loads(line)
+                    yield article.get(time_field), article.get(title_field) or ''
+
+def _chunks(records, size):
+    iterator = iter(records)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _score_chunk(task):
+    """
+    Scores one chunk of articles in model batches and returns it as a DataFrame.
+    """
+    first_row, records, batch_size = task
+    # Batching headlines of similar length keeps padding, and so wasted model work, small
+    order = sorted(range(len(records)), key=lambda i: len(records[i][1]))
+    probabilities = [None] * len(records)
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        batch = _backfill_analyzer.predict_probabilities([records[i][1] for i in indices])
+        if len(batch) != len(indices):
+            batch = [(float('nan'),) * 3] * len(indices)
+        for i, probs in zip(indices, batch):
+            probabilities[i] = probs
+
+    frame = pd.DataFrame(probabilities, columns=['positive', 'negative', 'neutral'])
+    frame.insert(0, 'row', range(first_row, first_row + len(records)))
+    # Dumps often mix ISO 8601 variants and RFC 2822 dates, so parse each value on its own
+    # instead of inferring one format from the first row
+    frame.insert(1, 'published_at', pd.to_datetime([published_at for published_at, _ in records],
+                                                   utc=True, errors='coerce', format='mixed'))
+    frame.insert(2, 'title', [title for _, title in records])
+    frame['score'] = frame['positive'] - frame['negative']
+    return frame
+
+def _load_checkpoint(output_dir):
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return {'rows_done': 0, 'parts': 0}
+    with open(path) as f:
+        return json.load(f)
+
+def _save_checkpoint(output_dir, checkpoint):
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def run_backfill(input_path, output_dir, workers=None, chunk_size=2048, batch_size=64, analyzer=None,
+                 title_field='title', time_field='publishedAt'):
+    """
+    Scores every article of a dump and writes per-article probabilities to Parquet part files.
+
+    Work is checkpointed after every chunk, so an interrupted run resumes where it stopped when
+    started again with the same input and output directory. Articles whose publish time is missing
+    or cannot be parsed are kept with a NaT publish time and counted in the checkpoint's
+    'unparsed_times'.
+
+    :param input_path: A JSONL or CSV article dump (see read_articles).
+    :param output_dir: The directory for the part files and the checkpoint.
+    :param workers: The number of processes; defaults to the number of CPU cores.
+    :param chunk_size: Articles per part file and per task handed to a worker.
+    :param batch_size: Headlines per model call.
+    :param analyzer: An optional loaded analyzer; by default FinBERT is loaded once and shared by all workers.
+    :return: The number of articles scored in this run.
+    """
+    global _backfill_analyzer
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint = _load_checkpoint(output_dir)
+    if checkpoint['rows_done']:
+        print(f"Resuming after {checkpoint['rows_done']} already scored articles.")
+
+    _backfill_analyzer = analyzer or SentimentAnalyzer()
+    if getattr(_backfill_analyzer, 'model', None) is None:
+        print("Failed to load sentiment model. Cannot run the backfill.")
+        return 0
+    workers = workers or os.cpu_count() or 1
+
+    first_row = checkpoint['rows_done']
+    records = itertools.islice(read_articles(input_path, title_field, time_field), first_row, None)
+    tasks = ((first_row + i * chunk_size, chunk, batch_size)
+             for i, chunk in enumerate(_chunks(records, chunk_size)))
+
+    pool = None
+    if workers > 1:
+        # Forked workers inherit the loaded model; split the cores between them
+        pool = multiprocessing.get_context('fork').Pool(
+            workers, initializer=_init_worker, initargs=(max(1, (os.cpu_count() or 1) // workers),))
+        frames = _ordered_results(pool, tasks, max_in_flight=workers * 2)
+    else:
+        frames = map(_score_chunk, tasks)
+
+    scored = 0
+    try:
+        # Frames arrive in input order, so the checkpoint only ever covers a contiguous prefix
+        for frame in frames:
+            part_path = os.path.join(output_dir, f"part-{checkpoint['parts']:05d}.parquet")
+            frame.to_parquet(part_path + '.tmp', index=False)
+            os.replace(part_path + '.tmp', part_path)
+            unparsed = int(frame['published_at'].isna().sum())
+            checkpoint['rows_done'] += len(frame)
+            checkpoint['parts'] += 1
+            checkpoint['unparsed_times'] = checkpoint.get('unparsed_times', 0) + unparsed
+            _save_checkpoint(output_dir, checkpoint)
+            scored += len(frame)
+            print(f"Scored {checkpoint['rows_done']} articles.")
+            if unparsed:
+                print(f"{unparsed} articles in {os.path.basename(part_path)} have a missing or unparseable "
+                      f"publish time and are stored with published_at NaT.")
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    if checkpoint.get('unparsed_times'):
+        print(f"Warning: {checkpoint['unparsed_times']} articles in total have no usable publish time.")
+    return scored
+
+def _ordered_results(pool, tasks, max_in_flight):
+    """
+    Yields _score_chunk results in task order, reading only a few chunks of the input ahead.
+    """
+    in_flight = deque()
+    for task in tasks:
+        in_flight.append(pool.apply_async(_score_chunk, (task,)))
+        if len(in_flight) >= max_in_flight:
+            yield in_flight.popleft().get()
+    while in_flight:
+        yield in_flight.popleft().get()
+
+def _init_worker(torch_threads):
+    import torch
+    torch.set_num_threads(torch_threads)
+
+def load_backfill(output_dir):
+    """
+    Loads a backfill's part files as one DataFrame indexed by publish time.
+    """
+    parts = sorted(f for f in os.listdir(output_dir) if f.startswith('part-') and f.endswith('.parquet'))
+    if not parts:
+        return pd.DataFrame(columns=['row', 'title', 'positive', 'negative', 'neutral', 'score'])
+    frame = pd.concat([pd.read_parquet(os.path.join(output_dir, part)) for part in parts], ignore_index=True)
+    return frame.set_index('published_at').sort_index()
+
+if __name__ == '__main__':
+    # Example usage:
+    # python3 -m src.sentiment_analysis.backfill articles.jsonl sentiment_backfill/ --workers 8
+    parser = argparse.ArgumentParser(description="Score a historical article dump with the sentiment model.")
+    parser.add_argument('input', help="A JSONL or CSV article dump")
+    parser.add_argument('output_dir', help="Directory for the Parquet part files and checkpoint")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=2048)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--title-field', default='title')
+    parser.add_argument('--time-field', default='publishedAt')
+    args = parser.parse_args()
+
+    count = run_backfill(args.input, args.output_dir, workers=args.workers, chunk_size=args.chunk_size,
+                         batch_size=args.batch_size, title_field=args.title_field, time_field=args.time_field)
+    print(f"Done. Scored {count} articles in this run.")
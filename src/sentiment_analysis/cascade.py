@@ -0,0 +1,194 @@
+import re
+import time
+
+# Finance terms with a clear direction. Each term also matches its inflections (see _inflections).
+POSITIVE_TERMS = [
+    'surge', 'soar', 'rally', 'jump', 'gain', 'climb', 'rise', 'rebound', 'bullish', 'breakout',
+    'record high', 'all-time high', 'outperform', 'upgrade', 'approval', 'approve', 'adoption', 'inflow',
+    'boost', 'beat', 'profit', 'skyrocket',
+]
+NEGATIVE_TERMS = [
+    'crash', 'plunge', 'plummet', 'tumble', 'slump', 'drop', 'fall', 'sink', 'dive', 'bearish', 'selloff',
+    'sell-off', 'profit-taking', 'hack', 'exploit', 'ban', 'lawsuit', 'sue', 'fraud', 'scam', 'bankrupt', 'bankruptcy',
+    'liquidation', 'outflow', 'downgrade', 'loss', 'collapse', 'default', 'investigation', 'crackdown',
+]
+# Forms the suffix rules in _inflections cannot produce
+IRREGULAR_FORMS = {
+    'rise': ['rose', 'risen'],
+    'fall': ['fell', 'fallen'],
+    'sink': ['sank', 'sunk'],
+    'dive': ['dove'],
+    'beat': ['beaten'],
+}
+# Words that can flip the meaning of a term; headlines containing them are left to the next tier
+NEGATIONS = ['not', 'no', "n't", 'never', 'despite', 'fails', 'failed', 'without', 'denies', 'halts',
+             'avoid', 'avoids', 'avoided', 'escapes', 'averts']
+
+def _inflections(term):
+    """
+    Returns a term with its plural, past and -ing forms (e.g. drop -> drops, dropped, dropping).
+    """
+    forms = {term, term + 's', term + 'es', term + 'ed', term + 'd', term + 'ing'}
+    if term.endswith('e'):
+        forms.add(term[:-1] + 'ing')  # rise -> rising
+    if term.endswith('y'):
+        forms.update({term[:-1] + 'ies', term[:-1] + 'ied'})  # rally -> rallies, rallied
+    if len(term) >= 3 and term[-1] not in 'aeiouwxy' and term[-2] in 'aeiou' and term[-3] not in 'aeiou':
+        forms.update({term + term[-1] + 'ed', term + term[-1] + 'ing'})  # ban -> banned, banning
+    forms.update(IRREGULAR_FORMS.get(term, []))
+    return forms
+
+def _compile(terms):
+    forms = {form for term in terms for form in _inflections(term)}
+    alternatives = '|'.join(re.escape(form) for form in sorted(forms, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\b", re.IGNORECASE)
+
+class LexiconScorer:
+    """
+    A cheap first-tier scorer that counts positive and negative finance terms in a headline.
+
+    A single term gives `term_confidence`, each further agreeing term adds to it, and conflicting
+    terms lower it. Headlines with no terms or with a negation get zero confidence, so they always
+    reach the next tier. By default only headlines with at least two agreeing terms pass the
+    cascade's default cutoff: a single term is too often outweighed by the rest of the headline
+    ("Profit-taking drags Bitcoin lower", "Bitcoin ETF inflows slow").
+    """
+    name = 'lexicon'
+
+    def __init__(self, positive_terms=POSITIVE_TERMS, negative_terms=NEGATIVE_TERMS, negations=NEGATIONS,
+                 score_scale=0.9, term_confidence=0.4):
+        """
+        :param score_scale: The score given to an unambiguous headline, close to what FinBERT
+                            typically gives a clearly positive or negative one.
+        :param term_confidence: The confidence of a headline with one matching term. The default is
+                                below the default cascade cutoff of 0.6, while two agreeing terms
+                                reach 0.64, so only those headlines skip the model.
+        """
+        self._positive = _compile(positive_terms)
+        self._negative = _compile(negative_terms)
+        self._negation = re.compile(r"(?:\b(?:" + '|'.join(re.escape(n) for n in negations if n != "n't") +
+                                    r")\b|n't\b)", re.IGNORECASE)
+        self.score_scale = score_scale
+        self.term_confidence = term_confidence
+
+    def score(self, headlines):
+        """
+        :param headlines: A list of strings (news headlines).
+        :return: A list of (score, confidence) tuples, with score between -1 and 1 and confidence between 0 and 1.
+        """
+        results = []
+        for headline in headlines:
+            positive = len(self._positive.findall(headline))
+            negative = len(self._negative.findall(headline))
+            hits = positive + negative
+            if not hits or self._negation.search(headline):
+                results.append((0.0, 0.0))
+                continue
+            purity = abs(positive - negative) / hits
+            score = self.score_scale * (positive - negative) / hits
+            # Every matching term closes the same share of the remaining gap to full confidence
+            confidence = purity * (1 - (1 - self.term_confidence) ** hits)
+            results.append((score, confidence))
+        return results
+
+def _direction(score, neutral_band=0.2):
+    if score > neutral_band:
+        return 1
+    if score < -neutral_band:
+        return -1
+    return 0
+
+class SentimentCascade:
+    """
+    Scores headlines with a series of increasingly expensive tiers.
+
+    Each tier is any object with a `name` and a `score(headlines)` method returning
+    (score, confidence) tuples. Headlines a tier scores with at least `confidence_cutoff`
+    stop there; the rest move on, and the final tier scores everything that is left.
+    Every `audit_every`-th accepted headline is also sent to the final tier to measure
+    how often the cheap tiers agree with it.
+    """
+    def __init__(self, tiers, final_tier, confidence_cutoff=0.6, audit_every=20):
+        self.tiers = list(tiers)
+        self.final_tier = final_tier
+        self.confidence_cutoff = confidence_cutoff
+        self.audit_every = audit_every
+        self._stats = {tier.name: self._empty_stats() for tier in self.tiers + [final_tier]}
+
+    @staticmethod
+    def _empty_stats():
+        return {'scored': 0, 'accepted': 0, 'seconds': 0.0, 'audited': 0, 'agreed': 0}
+
+    def _run(self, tier, headlines):
+        started = time.perf_counter()
+        results = tier.score(headlines)
+        stats = self._stats[tier.name]
+        stats['seconds'] += time.perf_counter() - started
+        stats['scored'] += len(headlines)
+        return results
+
+    def score(self, headlines):
+        """
+        :param headlines: A list of strings (news headlines).
+        :return: A list with one score between -1 and 1 per headline, or an empty list if the final tier fails.
+        """
+        scores = [None] * len(headlines)
+        pending = list(range(len(headlines)))
+        audits = []
+        for tier in self.tiers:
+            if not pending:
+                break
+            results = self._run(tier, [headlines[i] for i in pending])
+            still_pending = []
+            for i, (score, confidence) in zip(pending, results):
+                if confidence >= self.confidence_cutoff:
+                    scores[i] = score
+                    stats = self._stats[tier.name]
+                    stats['accepted'] += 1
+                    if self.audit_every and stats['accepted'] % self.audit_every == 0:
+                        audits.append((tier.name, i))
+                else:
+                    still_pending.append(i)
+            pending = still_pending
+
+        to_final = pending + [i for _, i in audits]
+        if to_final:
+            results = self._run(self.final_tier, [headlines[i] for i in to_final])
+            if len(results) != len(to_final):
+                return []
+            final_scores = {i: score for i, (score, _) in zip(to_final, results)}
+            self._stats[self.final_tier.name]['accepted'] += len(pending)
+            for i in pending:
+                scores[i] = final_scores[i]
+            for tier_name, i in audits:
+                stats = self._stats[tier_name]
+                stats['audited'] += 1
+                stats['agreed'] += _direction(scores[i]) == _direction(final_scores[i])
+        return scores
+
+    def stats(self):
+        """
+        :return: A dict per tier with headlines scored and accepted, the share it accepted, its
+                 agreement rate with the final tier on audited headlines, and its mean latency per headline.
+        """
+        report = {}
+        for name, stats in self._stats.items():
+            report[name] = {
+                'scored': stats['scored'],
+                'accepted': stats['accepted'],
+                'accept_rate': stats['accepted'] / stats['scored'] if stats['scored'] else 0.0,
+                'agreement_rate': stats['agreed'] / stats['audited'] if stats['audited'] else None,
+                'ms_per_headline': 1000 * stats['seconds'] / stats['scored'] if stats['scored'] else 0.0,
+            }
+        return report
+
+def format_cascade_stats(stats):
+    """
+    Formats SentimentCascade.stats() as printable lines.
+    """
+    lines = []
+    for name, tier in stats.items():
+        agreement = f"{tier['agreement_rate']:.0%}" if tier['agreement_rate'] is not None else 'n/a'
+        lines.append(f"{name}: accepted {tier['accepted']}/{tier['scored']} ({tier['accept_rate']:.0%}), "
+                     f"agreement {agreement}, {tier['ms_per_headline']:.2f}ms/headline")
+    return lines
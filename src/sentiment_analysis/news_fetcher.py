@@ -1,15 +1,16 @@
 import os
 from newsapi import NewsApiClient
 
-def fetch_news_headlines(api_key, query, page_size=100, language='en'):
+def fetch_news_articles(api_key, query, page_size=100, language='en', from_param=None):
     """
-    Fetches news headlines for a given query using the NewsAPI.
+    Fetches news articles for a given query using the NewsAPI.
 
     :param api_key: Your NewsAPI API key.
     :param query: The keyword to search for (e.g., 'Bitcoin').
     :param page_size: The number of articles to return.
     :param language: The language of the articles.
-    :return: A list of article headlines, or an empty list if an error occurs.
+    :param from_param: Optional ISO 8601 timestamp; only articles published from then on are returned.
+    :return: A list of dicts with 'title' and 'publishedAt', newest first, or an empty list if an error occurs.
     """
     if not api_key:
         print("Error: NewsAPI key is not provided.")
@@ -23,14 +24,14 @@ def fetch_news_headlines(api_key, query, page_size=100, language='en'):
             q=query,
             language=language,
             sort_by='publishedAt', # or 'relevancy' or 'popularity'
-            page_size=page_size
+            page_size=page_size,
+            from_param=from_param
         )
 
         if top_headlines['status'] == 'ok':
-            articles = top_headlines['articles']
-            # We only need the titles for sentiment analysis
-            headlines = [article['title'] for article in articles]
-            return headlines
+            # We only need the titles for sentiment analysis, plus the publish time for cursors
+            return [{'title': article['title'], 'publishedAt': article.get('publishedAt')}
+                    for article in top_headlines['articles']]
         else:
             print(f"Error fetching news from NewsAPI: {top_headlines.get('message')}")
             return []
@@ -39,6 +40,19 @@ def fetch_news_headlines(api_key, query, page_size=100, language='en'):
         print(f"An unexpected error occurred while fetching news: {e}")
         return []
 
+def fetch_news_headlines(api_key, query, page_size=100, language='en'):
+    """
+    Fetches news headlines for a given query using the NewsAPI.
+
+    :param api_key: Your NewsAPI API key.
+    :param query: The keyword to search for (e.g., 'Bitcoin').
+    :param page_size: The number of articles to return.
+    :param language: The language of the articles.
+    :return: A list of article headlines, or an empty list if an error occurs.
+    """
+    articles = fetch_news_articles(api_key, query, page_size=page_size, language=language)
+    return [article['title'] for article in articles]
+
 if __name__ == '__main__':
     # Example Usage:
     # To run this, you must set the NEWS_API_KEY environment variable.
@@ -0,0 +1,185 @@
+import os
+import time
+import zlib
+import pickle
+import tempfile
+
+from src.data_acquisition.exchange import ohlcv_to_dataframe, dataframe_to_ohlcv, timeframe_to_ms
+
+SNAPSHOT_VERSION = 1
+
+class BotState:
+    """
+    Runtime state that lets the bot warm-restart instead of rebuilding everything from scratch.
+
+    It holds the candle window per (exchange, symbol, timeframe), the recent articles and publish
+    cursor per news query, and the last alert sent per symbol. Together with the sentiment analyzer's
+    headline score cache it is periodically written to disk as a compressed binary snapshot.
+    """
+    def __init__(self):
+        self.candles = {}
+        self.news = {}
+        self.last_signals = {}
+        self.headline_scores = {}
+
+    # --- Candles ---
+
+    def candles_since(self, exchange_name, symbol, timeframe, limit, now=None):
+        """
+        Returns the timestamp (ms) to fetch new candles from, or None to fetch the latest window.
+        The last stored candle is fetched again because it may still have been open.
+
+        A fetch from `since` returns the `limit` candles that follow it, not the newest ones, so
+        when the stored window is too old for those to reach the current candle (e.g. after a long
+        downtime) None is returned.
+
+        :param limit: The number of candles the fetch will ask for.
+        :param now: The current time in seconds, defaults to time.time().
+        """
+        window = self.candles.get((exchange_name, symbol, timeframe))
+        if not window:
+            return None
+        now_ms = (time.time() if now is None else now) * 1000
+        if now_ms - window[-1][0] >= (limit - 1) * timeframe_to_ms(timeframe):
+            return None
+        return window[-1][0]
+
+    def merge_candles(self, exchange_name, symbol, timeframe, df, limit, now=None):
+        """
+        Merges freshly fetched candles into the stored window and returns the window as a DataFrame.
+
+        :param df: The DataFrame returned by fetch_ohlcv, or None if the fetch failed.
+        :param limit: The number of candles to keep.
+        :param now: The current time in seconds, defaults to time.time().
+        :return: A DataFrame with at most `limit` candles, or None if the fetch failed or the
+                 window does not reach the current candle.
+        """
+        if df is None or df.empty:
+            return None
+        key = (exchange_name, symbol, timeframe)
+        interval = timeframe_to_ms(timeframe)
+        fetched = dataframe_to_ohlcv(df)
+        stored = self.candles.get(key, [])
+        # Stored candles that do not connect to the fetched ones would leave a gap in the window
+        if stored and stored[-1][0] + interval < fetched[0][0]:
+            stored = []
+        rows = {row[0]: row for row in stored}
+        rows.update((row[0], row) for row in fetched)
+        self.candles[key] = [rows[ts] for ts in sorted(rows)][-limit:]
+
+        now_ms = (time.time() if now is None else now) * 1000
+        if now_ms - self.candles[key][-1][0] >= 2 * interval:
+            print(f"Candles for {symbol} do not reach the current candle. Fetching the latest window next cycle.")
+            del self.candles[key]
+            return None
+        window = ohlcv_to_dataframe(self.candles[key])
+        window.attrs.update(df.attrs)
+        return window
+
+    # --- News ---
+
+    def news_cursor(self, query):
+        """
+        Returns the publish time of the newest stored article for a query, or None.
+        """
+        return self.news.get(query, {}).get('cursor')
+
+    def merge_articles(self, query, articles, page_size=100):
+        """
+        Merges freshly fetched articles into the stored window for a query.
+
+        :param articles: Dicts with 'title' and 'publishedAt' as returned by fetch_news_articles.
+        :param page_size: The number of articles to keep.
+        :return: The headlines of the stored window, newest first.
+        """
+        entry = self.news.setdefault(query, {'cursor': None, 'articles': []})
+        seen = {(a['title'], a['publishedAt']) for a in entry['articles']}
+        new_articles = [a for a in articles if (a['title'], a['publishedAt']) not in seen]
+        merged = sorted(new_articles + entry['articles'], key=lambda a: a['publishedAt'] or '', reverse=True)
+        entry['articles'] = merged[:page_size]
+        if entry['articles']:
+            entry['cursor'] = entry['articles'][0]['publishedAt']
+        return [a['title'] for a in entry['articles']]
+
+    # --- Alerts ---
+
+    def is_new_alert(self, symbol, signal, timestamp):
+        """
+        Returns False if the same signal was already sent for the same candle.
+        """
+        return self.last_signals.get(symbol) != (signal, timestamp)
+
+    def record_alert(self, symbol, signal, timestamp):
+        self.last_signals[symbol] = (signal, timestamp)
+
+    # --- Snapshots ---
+
+    def save(self, path, analyzer=None):
+        """
+        Atomically writes the state to disk: the snapshot is written to a temporary file
+        in the same directory and then renamed over the previous one.
+
+        :param path: The snapshot file path.
+        :param analyzer: An optional SentimentAnalyzer whose headline score cache is included.
+        :return: True on success, False otherwise.
+        """
+        if analyzer is not None and getattr(analyzer, 'score_cache', None) is not None:
+            self.headline_scores = dict(analyzer.score_cache)
+        payload = {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'candles': self.candles,
+            'news': self.news,
+            'last_signals': self.last_signals,
+            'headline_scores': self.headline_scores,
+        }
+        data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return True
+        except OSError as e:
+            print(f"Error writing state snapshot {path}: {e}")
+            return False
+
+    @classmethod
+    def load(cls, path, analyzer=None):
+        """
+        Restores state from a snapshot written by save(). Only load snapshots this bot wrote itself.
+
+        :param path: The snapshot file path.
+        :param analyzer: An optional SentimentAnalyzer whose headline score cache is restored.
+        :return: The restored BotState, or an empty one if the file is missing or unreadable.
+        """
+        state = cls()
+        if not os.path.exists(path):
+            return state
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.loads(zlib.decompress(f.read()))
+        except Exception as e:
+            print(f"Could not read state snapshot {path}: {e}. Starting from scratch.")
+            return state
+        if payload.get('version') != SNAPSHOT_VERSION:
+            print(f"Ignoring state snapshot {path} with unsupported version {payload.get('version')}.")
+            return state
+
+        state.candles = payload['candles']
+        state.news = payload['news']
+        state.last_signals = payload['last_signals']
+        state.headline_scores = payload['headline_scores']
+        if analyzer is not None and getattr(analyzer, 'score_cache', None) is not None:
+            analyzer.score_cache.update(state.headline_scores)
+        print(f"Restored state snapshot from {path} "
+              f"({len(state.candles)} candle windows, {len(state.headline_scores)} scored headlines).")
+        return state
@@ -1,12 +1,98 @@
+import threading
+from collections import OrderedDict
+
 import pandas_ta as ta
 
+class IndicatorCache:
+    """
+    A size-bounded LRU cache of indicator results.
+
+    Results are keyed by the series identity (exchange, symbol and timeframe from DataFrame.attrs, as
+    set by fetch_ohlcv), the timestamp of the last closed candle, the indicator and its parameters.
+    Only frames passed through closed_candles are cached: a closed candle never changes, so the key
+    identifies the input without hashing the prices, and every poll within a candle is a hit. The
+    last close is part of the key as a cheap check that the last candle really was final. Other
+    frames (with a still-open candle or no identity) are computed directly.
+    """
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(df, indicator, params):
+        """
+        :return: The cache key for df, or None if df cannot be cached.
+        """
+        attrs = df.attrs
+        identity = (attrs.get('exchange'), attrs.get('symbol'), attrs.get('timeframe'))
+        if not attrs.get('closed') or not len(df) or 'close' not in df.columns or not all(identity):
+            return None
+        # The window length is part of the key: the same last candle with more history gives other values.
+        # The last close guards against a candle that was still forming when the frame was built.
+        return identity + (str(df.index[-1]), len(df), float(df['close'].iloc[-1]), indicator, params)
+
+    def get_or_compute(self, df, indicator, params, compute):
+        """
+        Returns the cached result for (df, indicator, params), computing and storing it on a miss.
+        """
+        key = self.make_key(df, indicator, params)
+        if key is None:
+            return compute()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        """
+        :return: A dict with hits, misses, hit_rate and the current number of entries.
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+# Shared by every caller in this process
+indicator_cache = IndicatorCache()
+
+def _append(df, result):
+    # Same effect as pandas-ta's append=True, from a possibly cached result
+    if result is None:
+        return
+    if hasattr(result, 'columns'):
+        for col in result.columns:
+            df[col] = result[col]
+    else:
+        df[result.name] = result
+
 def add_rsi(df, length=14):
     """
     Calculates the Relative Strength Index (RSI) and adds it to the DataFrame.
     :param df: pandas DataFrame with 'close' prices.
     :param length: The time period for RSI calculation.
     """
-    df.ta.rsi(length=length, append=True)
+    _append(df, indicator_cache.get_or_compute(df, 'rsi', (length,), lambda: df.ta.rsi(length=length)))
     return df
 
 def add_macd(df, fast=12, slow=26, signal=9):
@@ -17,7 +103,8 @@ def add_macd(df, fast=12, slow=26, signal=9):
     :param slow: The slow period for the MACD.
     :param signal: The signal period for the MACD.
     """
-    df.ta.macd(fast=fast, slow=slow, signal=signal, append=True)
+    _append(df, indicator_cache.get_or_compute(df, 'macd', (fast, slow, signal),
+                                               lambda: df.ta.macd(fast=fast, slow=slow, signal=signal)))
     return df
 
 def add_bollinger_bands(df, length=20, std=2):
@@ -27,7 +114,8 @@ def add_bollinger_bands(df, length=20, std=2):
     :param length: The time period for the moving average.
     :param std: The number of standard deviations.
     """
-    df.ta.bbands(length=length, std=std, append=True)
+    _append(df, indicator_cache.get_or_compute(df, 'bbands', (length, std),
+                                               lambda: df.ta.bbands(length=length, std=std)))
     return df
 
 if __name__ == '__main__':
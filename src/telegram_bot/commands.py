@@ -0,0 +1,207 @@
+import time
+from collections import deque
+
+from telegram.ext import Application, CommandHandler
+
+from src.latency.budget import describe_freshness
+
+class MarketSnapshot:
+    """
+    The latest per-symbol readings published by the scan cycle.
+
+    Commands only ever read from this snapshot, so answering a chat message never triggers
+    a market data fetch or a model inference. Each publish swaps in a new dict, so readers
+    always see a complete cycle.
+    """
+    def __init__(self):
+        self.readings = {}
+        self.cycle = 0
+        self.updated_at = None
+
+    def publish(self, readings):
+        """
+        Merges a cycle's readings into the snapshot.
+
+        :param readings: A dict mapping symbol to a dict with signal, price, rsi, sentiment and timestamp.
+        """
+        merged = dict(self.readings)
+        merged.update(readings)
+        self.readings = merged
+        self.updated_at = time.time()
+        self.cycle += 1
+
+class RateLimiter:
+    """
+    Allows each user at most max_requests requests in any window of per_seconds seconds.
+
+    Users with no request in the last window are dropped, so memory stays bounded by recent users.
+    """
+    def __init__(self, max_requests=5, per_seconds=60):
+        self.max_requests = max_requests
+        self.per_seconds = per_seconds
+        self._requests = {}
+        self._last_sweep = None
+
+    def allow(self, user_id, now=None):
+        now = time.monotonic() if now is None else now
+        # Anyone can message the bot, so forget users whose requests have all expired
+        if self._last_sweep is None or now - self._last_sweep >= self.per_seconds:
+            self._requests = {user: requests for user, requests in self._requests.items()
+                              if requests and now - requests[-1] < self.per_seconds}
+            self._last_sweep = now
+        requests = self._requests.setdefault(user_id, deque())
+        while requests and now - requests[0] >= self.per_seconds:
+            requests.popleft()
+        if len(requests) >= self.max_requests:
+            return False
+        requests.append(now)
+        return True
+
+MAX_MESSAGE_LENGTH = 4096  # Telegram rejects longer messages
+
+def _format_number(value, pattern):
+    return pattern.format(value) if value is not None else 'n/a'
+
+def _join_lines(lines, total, hint):
+    """
+    Joins reply lines, stopping before the message would exceed Telegram's length limit.
+
+    :param lines: The lines to show, at most one per symbol.
+    :param total: The number of symbols the reply is about, so the rest can be counted.
+    :param hint: What to try instead when lines were left out.
+    """
+    shown = []
+    length = 0
+    for line in lines:
+        if length + len(line) + 1 > MAX_MESSAGE_LENGTH - len(hint) - 40:
+            break
+        shown.append(line)
+        length += len(line) + 1
+    if len(shown) < total:
+        shown.append(f"...and {total - len(shown)} more. {hint}")
+    return '\n'.join(shown)
+
+class CommandResponder:
+    """
+    Builds replies to chat commands from a MarketSnapshot, caching each reply until the next cycle.
+
+    Commands without a symbol list at most max_symbols symbols, so replies stay within
+    Telegram's message length limit when hundreds of pairs are tracked.
+    """
+    COMMANDS = ('signal', 'rsi', 'sentiment', 'top')
+
+    def __init__(self, snapshot, top_count=5, max_symbols=20):
+        self.snapshot = snapshot
+        self.top_count = top_count
+        self.max_symbols = max_symbols
+        self._cache = {}
+        self._cache_cycle = None
+
+    def respond(self, command, args=()):
+        """
+        :param command: One of COMMANDS, without the leading slash.
+        :param args: The command's arguments, e.g. ['BTC/USDT'].
+        :return: The reply text.
+        """
+        if self._cache_cycle != self.snapshot.cycle:
+            self._cache = {}
+            self._cache_cycle = self.snapshot.cycle
+        key = (command, tuple(arg.upper() for arg in args))
+        if key not in self._cache:
+            self._cache[key] = self._build(command, key[1])
+        return self._cache[key]
+
+    def _build(self, command, args):
+        readings = self.snapshot.readings
+        if not readings:
+            return "No readings yet. The first scan cycle has not finished."
+        if command == 'top':
+            return self._top(readings)
+
+        symbols = [self._resolve(args[0], readings)] if args else sorted(readings)
+        if symbols == [None]:
+            tracked = sorted(readings)
+            listed = ', '.join(tracked[:self.max_symbols])
+            if len(tracked) > self.max_symbols:
+                listed += f" and {len(tracked) - self.max_symbols} more"
+            return f"No readings for {args[0]}. Tracked symbols: {listed}"
+
+        if command == 'signal':
+            lines = (self._signal_line(symbol, readings[symbol]) for symbol in symbols[:self.max_symbols])
+        elif command == 'rsi':
+            lines = (f"{symbol}: RSI {_format_number(readings[symbol].get('rsi'), '{:.1f}')}"
+                     for symbol in symbols[:self.max_symbols])
+        elif command == 'sentiment':
+            lines = (f"{symbol}: sentiment {_format_number(readings[symbol].get('sentiment'), '{:+.3f}')}"
+                     for symbol in symbols[:self.max_symbols])
+        else:
+            return f"Unknown command. Try /{', /'.join(self.COMMANDS)}."
+        return _join_lines(lines, len(symbols), f"Use /top or /{command} SYMBOL.")
+
+    @staticmethod
+    def _resolve(arg, readings):
+        # Accept 'BTC/USDT', 'btc/usdt' or just the base currency 'BTC'
+        if arg in readings:
+            return arg
+        matches = [symbol for symbol in sorted(readings) if symbol.split('/')[0] == arg]
+        return matches[0] if matches else None
+
+    @staticmethod
+    def _signal_line(symbol, reading):
+        line = (f"{symbol}: {reading['signal'].upper()} | "
+                f"close ${_format_number(reading.get('price'), '{:,.2f}')} | "
+                f"RSI {_format_number(reading.get('rsi'), '{:.1f}')} | "
+                f"sentiment {_format_number(reading.get('sentiment'), '{:+.3f}')} | "
+                f"candle {reading.get('timestamp', 'n/a')}")
+        if reading.get('freshness'):
+            line += f" | inputs: {describe_freshness(reading['freshness'])}"
+        return line
+
+    def _top(self, readings):
+        # Actionable signals first, then the most stretched RSI readings
+        def rank(symbol):
+            reading = readings[symbol]
+            rsi = reading.get('rsi')
+            return (reading['signal'] == 'hold', -abs(rsi - 50) if rsi is not None else 0, symbol)
+        top = sorted(readings, key=rank)[:self.top_count]
+        return _join_lines((self._signal_line(symbol, readings[symbol]) for symbol in top), len(top),
+                           "Use /signal SYMBOL.")
+
+def build_command_application(token, snapshot, rate_limiter=None):
+    """
+    Builds a python-telegram-bot Application that answers /signal, /rsi, /sentiment and /top.
+
+    :param token: The Telegram Bot API token.
+    :param snapshot: The MarketSnapshot updated by the scan cycle.
+    :param rate_limiter: An optional RateLimiter; defaults to 5 requests per user per minute.
+    :return: The Application; run it with start_command_server.
+    """
+    responder = CommandResponder(snapshot)
+    limiter = rate_limiter or RateLimiter()
+
+    async def handle(update, context):
+        user = update.effective_user
+        if user is None or update.effective_message is None:
+            return
+        if not limiter.allow(user.id):
+            return
+        command = update.effective_message.text.split()[0].lstrip('/').split('@')[0].lower()
+        await update.effective_message.reply_text(responder.respond(command, context.args or []))
+
+    application = Application.builder().token(token).build()
+    application.add_handler(CommandHandler(list(CommandResponder.COMMANDS), handle))
+    return application
+
+async def start_command_server(application):
+    """
+    Starts polling for commands on the running event loop without blocking it.
+    """
+    await application.initialize()
+    await application.start()
+    await application.updater.start_polling(drop_pending_updates=True)
+    print("Telegram command server started.")
+
+async def stop_command_server(application):
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
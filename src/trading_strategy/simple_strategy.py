@@ -55,6 +55,24 @@ def generate_signal(df, sentiment_score):
     else:
         return 'hold'
 
+def latest_reading(df, signal, sentiment_score):
+    """
+    Summarizes the latest candle of an analyzed DataFrame for alerts and chat commands.
+
+    :param df: A pandas DataFrame containing OHLCV data and technical indicators.
+    :param signal: The signal generated for the DataFrame.
+    :param sentiment_score: The sentiment score used for the signal.
+    :return: A dict with signal, price (the latest candle's close), rsi, sentiment and the latest candle's timestamp.
+    """
+    rsi = df['RSI_14'].iloc[-1] if 'RSI_14' in df.columns else None
+    return {
+        'signal': signal,
+        'price': float(df['close'].iloc[-1]),
+        'rsi': None if rsi is None or pd.isna(rsi) else float(rsi),
+        'sentiment': sentiment_score,
+        'timestamp': str(df.index[-1]),
+    }
+
 if __name__ == '__main__':
     # Example Usage
 
@@ -0,0 +1,86 @@
+import queue
+import multiprocessing
+from multiprocessing.managers import BaseManager
+
+class LocalBroker:
+    """
+    An in-machine broker: one inbox queue per worker plus a shared result queue.
+    """
+    def __init__(self, context=None):
+        self._context = context or multiprocessing.get_context()
+        self._inboxes = {}
+        self._results = self._context.Queue()
+
+    def inbox(self, worker_id):
+        if worker_id not in self._inboxes:
+            self._inboxes[worker_id] = self._context.Queue()
+        return self._inboxes[worker_id]
+
+    def results(self):
+        return self._results
+
+# --- Networked broker ---
+# The queues live in the broker server process; coordinator and workers on
+# other machines reach them through manager proxies.
+_inboxes = {}
+_results = queue.Queue()
+
+def _get_inbox(worker_id):
+    if worker_id not in _inboxes:
+        _inboxes[worker_id] = queue.Queue()
+    return _inboxes[worker_id]
+
+def _get_results():
+    return _results
+
+class BrokerManager(BaseManager):
+    pass
+
+BrokerManager.register('get_inbox', callable=_get_inbox)
+BrokerManager.register('get_results', callable=_get_results)
+
+class RemoteBroker:
+    """
+    A broker reached over TCP, so workers can run on several machines.
+    """
+    def __init__(self, address, authkey):
+        """
+        :param address: (host, port) of a broker started with serve_broker.
+        :param authkey: The shared secret (bytes) the broker was started with.
+        """
+        if not authkey:
+            raise ValueError("A non-empty authkey is required to connect to a broker.")
+        self._manager = BrokerManager(address=address, authkey=authkey)
+        self._manager.connect()
+        self._inboxes = {}
+
+    def inbox(self, worker_id):
+        if worker_id not in self._inboxes:
+            self._inboxes[worker_id] = self._manager.get_inbox(worker_id)
+        return self._inboxes[worker_id]
+
+    def results(self):
+        return self._manager.get_results()
+
+def serve_broker(address, authkey):
+    """
+    Starts a broker server in a background process.
+
+    :param address: (host, port) to listen on, e.g. ('0.0.0.0', 50000).
+    :param authkey: A shared secret (bytes) that coordinator and workers must present.
+    :return: The started BrokerManager; call shutdown() on it to stop the broker.
+    :raises ValueError: If authkey is empty. The broker unpickles what it receives, so it
+                        must never accept unauthenticated connections.
+    """
+    if not authkey:
+        raise ValueError("A non-empty authkey is required to start a broker.")
+    manager = BrokerManager(address=address, authkey=authkey)
+    manager.start()
+    return manager
+
+def parse_address(text):
+    """
+    Parses a 'host:port' string into an address tuple.
+    """
+    host, _, port = text.rpartition(':')
+    return (host or 'localhost', int(port))
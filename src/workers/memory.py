@@ -0,0 +1,58 @@
+import os
+import sys
+
+def memory_usage(pid='self'):
+    """
+    Reports the memory of a process in megabytes.
+
+    On Linux this reads /proc/<pid>/smaps_rollup: 'private' is memory only this process uses
+    (its real per-process overhead), 'shared' is memory shared with other processes, such as
+    model weights inherited copy-on-write from a parent, and 'pss' splits shared pages evenly
+    between the processes that map them. On other Unix systems only the peak RSS of this process
+    is known, and on Windows nothing is reported.
+
+    :param pid: A process id, or 'self' for the current process.
+    :return: A dict with rss, pss, private and shared in MB (pss, private and shared are None when unavailable),
+             or None if the memory of the process cannot be read.
+    """
+    try:
+        fields = {}
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+        return {
+            'rss': fields['Rss'],
+            'pss': fields['Pss'],
+            'private': fields['Private_Clean'] + fields['Private_Dirty'],
+            'shared': fields['Shared_Clean'] + fields['Shared_Dirty'],
+        }
+    except (OSError, KeyError):
+        if pid != 'self' and pid != os.getpid():
+            return None
+        try:
+            import resource  # Unix only
+        except ImportError:
+            return None
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return {'rss': max_rss / divisor, 'pss': None, 'private': None, 'shared': None}
+
+def format_memory_report(usage_by_process):
+    """
+    Formats per-process memory usage as printable lines.
+
+    :param usage_by_process: A dict mapping a process name to a memory_usage() result.
+    """
+    lines = []
+    for name, usage in sorted(usage_by_process.items()):
+        if usage is None:
+            continue
+        if usage['private'] is None:
+            lines.append(f"{name}: peak RSS {usage['rss']:.0f}MB")
+        else:
+            lines.append(f"{name}: RSS {usage['rss']:.0f}MB, private {usage['private']:.0f}MB, "
+                         f"shared {usage['shared']:.0f}MB, PSS {usage['pss']:.0f}MB")
+    return lines
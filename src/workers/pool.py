@@ -0,0 +1,415 @@
+import gc
+import os
+import sys
+import time
+import functools
+import zlib
+import queue
+import multiprocessing
+
+from src.data_acquisition.exchange import fetch_ohlcv, closed_candles
+from src.technical_analysis.indicators import add_rsi, add_macd, add_bollinger_bands, indicator_cache
+from src.trading_strategy.simple_strategy import generate_signal, latest_reading
+from src.sentiment_analysis.analyzer import SentimentAnalyzer
+from src.sentiment_analysis.cascade import LexiconScorer, format_cascade_stats
+from src.state.snapshot import BotState
+from src.workers.broker import LocalBroker, RemoteBroker, parse_address
+from src.workers.memory import memory_usage, format_memory_report
+
+def news_query_for(symbol, news_queries=None, default_query='Bitcoin'):
+    """
+    Returns the NewsAPI query for a symbol, e.g. 'Ethereum' for 'ETH/USDT' with {'ETH': 'Ethereum'}.
+
+    :param symbol: The trading pair symbol.
+    :param news_queries: Optional mapping of base currency to query.
+    :param default_query: The query for symbols whose base currency is not in `news_queries`.
+    """
+    return (news_queries or {}).get(symbol.split('/')[0], default_query)
+
+def score_news(analyzer, headlines_by_query):
+    """
+    Scores the headlines of every news query once.
+
+    :param analyzer: A SentimentAnalyzer (or any object with analyze_sentiment).
+    :param headlines_by_query: A dict mapping a news query to its headlines.
+    :return: A dict mapping each query to its sentiment score (0.0 for a query without headlines).
+    """
+    return {query: analyzer.analyze_sentiment(headlines) if headlines else 0.0
+            for query, headlines in headlines_by_query.items()}
+
+def run_shard(analyzer, settings, symbols, state=None, sentiment_by_symbol=None):
+    """
+    Runs the fetch -> indicators -> generate_signal pipeline for a shard of symbols.
+
+    News is fetched and scored once per query by the coordinator (see WorkerPool.run_cycle),
+    so shards only receive the resulting scores.
+
+    :param analyzer: A SentimentAnalyzer (or any object with analyze_sentiment).
+    :param settings: A dict with exchange_name, timeframe and limit.
+    :param symbols: The symbols to analyze.
+    :param state: An optional BotState; when given, only new candles are fetched.
+    :param sentiment_by_symbol: A dict mapping each symbol to its sentiment score; missing symbols
+                                get neutral sentiment.
+    :return: A list of readings (see latest_reading) tagged with their symbol, for every symbol
+             that could be analyzed.
+    """
+    exchange_name = settings['exchange_name']
+    timeframe = settings['timeframe']
+    results = []
+    sentiment_by_symbol = sentiment_by_symbol or {}
+    for symbol in symbols:
+        since = state.candles_since(exchange_name, symbol, timeframe, settings['limit']) if state is not None else None
+        market_data = fetch_ohlcv(exchange_name=exchange_name, symbol=symbol, timeframe=timeframe,
+                                  limit=settings['limit'], since=since)
+        if state is not None:
+            market_data = state.merge_candles(exchange_name, symbol, timeframe, market_data, settings['limit'])
+        market_data = closed_candles(market_data)
+        if market_data is None or market_data.empty:
+            print(f"Could not fetch market data for {symbol}. Skipping.")
+            continue
+
+        sentiment_score = sentiment_by_symbol.get(symbol, 0.0)
+
+        add_rsi(market_data)
+        add_macd(market_data)
+        add_bollinger_bands(market_data)
+
+        signal = generate_signal(market_data, sentiment_score)
+        results.append(dict(latest_reading(market_data, signal, sentiment_score), symbol=symbol))
+    return results
+
+class SharedAnalyzer:
+    """
+    An analyzer factory that hands a model loaded once in the coordinator to forked workers.
+
+    Forked workers inherit the parent's memory copy-on-write, and inference never writes to the
+    weight tensors, so all workers share one copy of the weights instead of loading their own.
+    Avoid running inference in the parent before forking, so no thread pools are inherited.
+    """
+    def __init__(self, analyzer, torch_threads=None):
+        """
+        :param analyzer: A loaded SentimentAnalyzer.
+        :param torch_threads: Optional number of intra-op threads per worker, to avoid
+                              oversubscribing the CPU when several workers run inference.
+        """
+        self.analyzer = analyzer
+        self.torch_threads = torch_threads
+
+    def __call__(self):
+        if self.torch_threads:
+            import torch
+            torch.set_num_threads(self.torch_threads)
+        return self.analyzer
+
+def worker_loop(worker_id, inbox, results, settings, analyzer_factory=SentimentAnalyzer, shard_runner=run_shard):
+    """
+    Serves tasks from an inbox until it receives None.
+
+    Each task is a (task_id, kind, payload) tuple. For a 'score' task the payload maps news queries
+    to headlines, and the worker replies with ('scores', worker_id, task_id, scores) (see score_news).
+    For a 'shard' task the payload is a (symbols, sentiment_by_symbol) tuple, and the worker replies
+    with ('done', worker_id, task_id, shard_results). Both replies are followed by
+    ('memory', worker_id, None, usage) with its current memory_usage(). If settings has a snapshot_path, the worker
+    restores its state from '<snapshot_path>.<worker_id>' and saves it after every shard.
+    """
+    analyzer = analyzer_factory()
+    settings = dict(settings, worker_id=worker_id)
+    snapshot_path = f"{settings['snapshot_path']}.{worker_id}" if settings.get('snapshot_path') else None
+    state = BotState.load(snapshot_path, analyzer) if snapshot_path else None
+    results.put(('ready', worker_id, None, memory_usage()))
+    while True:
+        task = inbox.get()
+        if task is None:
+            break
+        task_id, kind, payload = task
+        if kind == 'score':
+            try:
+                scores = score_news(analyzer, payload)
+            except Exception as e:
+                print(f"Worker {worker_id} failed to score news for {list(payload)}: {e}")
+                scores = {}
+            results.put(('scores', worker_id, task_id, scores))
+            results.put(('memory', worker_id, None, memory_usage()))
+            continue
+        symbols, sentiment_by_symbol = payload
+        try:
+            shard_results = shard_runner(analyzer, settings, symbols, state=state,
+                                         sentiment_by_symbol=sentiment_by_symbol)
+        except Exception as e:
+            print(f"Worker {worker_id} failed on {symbols}: {e}")
+            shard_results = []
+        results.put(('done', worker_id, task_id, shard_results))
+        stats = indicator_cache.stats()
+        print(f"Worker {worker_id} indicator cache: {stats['hits']} hits, {stats['misses']} misses")
+        if getattr(analyzer, 'cascade', None):
+            for line in format_cascade_stats(analyzer.cascade.stats()):
+                print(f"Worker {worker_id} sentiment cascade {line}")
+        results.put(('memory', worker_id, None, memory_usage()))
+        if state is not None:
+            state.save(snapshot_path, analyzer)
+
+def assign_shards(symbols, worker_ids):
+    """
+    Partitions symbols across workers by a stable hash, so a symbol stays on the same worker between cycles.
+
+    :return: A dict mapping worker id to its list of symbols (workers with no symbols are omitted).
+    """
+    worker_ids = sorted(worker_ids)
+    shards = {}
+    for symbol in symbols:
+        worker_id = worker_ids[zlib.crc32(symbol.encode('utf-8')) % len(worker_ids)]
+        shards.setdefault(worker_id, []).append(symbol)
+    return shards
+
+class WorkerPool:
+    """
+    A coordinator that shards symbols across worker processes and gathers their signals.
+
+    News headlines are fetched by the caller once per query and scored once per cycle by a single
+    worker (the first live one, so its headline cache stays warm); shards only receive the scores.
+
+    Local workers are child processes on this machine. Remote workers run `python3 -m src.workers.pool`
+    on other machines and talk to the coordinator through a RemoteBroker. When a worker dies or misses
+    the shard timeout, its symbols are reassigned to the remaining workers. A worker that misses the
+    timeout rejoins as soon as it replies again, and local workers that exit are restarted at the
+    start of the next cycle.
+    """
+    def __init__(self, num_workers, settings, broker=None, remote_workers=(), shard_timeout=120,
+                 analyzer_factory=SentimentAnalyzer, shard_runner=run_shard, context=None):
+        """
+        :param num_workers: The number of local worker processes to start.
+        :param settings: Pipeline settings passed to every worker (see run_shard). The coordinator
+                         also reads news_query and news_queries from it (see news_query_for).
+        :param broker: A LocalBroker or RemoteBroker; defaults to a LocalBroker.
+        :param remote_workers: Ids of workers started on other machines.
+        :param shard_timeout: Seconds a worker may take for one shard before it is considered dead.
+        :param analyzer_factory: Callable that builds the sentiment analyzer inside each worker.
+                                 Pass a SharedAnalyzer (with a 'fork' context) to share one loaded model.
+        :param shard_runner: Callable that analyzes one shard (see run_shard).
+        :param context: The multiprocessing context used for local workers.
+        """
+        self.context = context or multiprocessing.get_context()
+        self.broker = broker or LocalBroker(self.context)
+        self.settings = settings
+        self.shard_timeout = shard_timeout
+        self.analyzer_factory = analyzer_factory
+        self.shard_runner = shard_runner
+        self.processes = {}
+        self.alive = set()
+        self.memory = {}
+        self._num_workers = num_workers
+        self._remote_workers = list(remote_workers)
+        self._next_task_id = 0
+        self._sentiment_by_symbol = {}
+
+    def start(self):
+        shared = isinstance(self.analyzer_factory, SharedAnalyzer)
+        if shared and self._num_workers:
+            if self.context.get_start_method() != 'fork':
+                raise ValueError("A SharedAnalyzer needs the 'fork' start method to share model memory.")
+            # Move everything allocated so far out of the garbage collector's reach, so collections
+            # in the workers do not write to (and thereby copy) the inherited pages.
+            gc.collect()
+            gc.freeze()
+
+        for i in range(self._num_workers):
+            self._start_local(f'local-{i}')
+        if shared and self._num_workers:
+            gc.unfreeze()
+        self.alive.update(self._remote_workers)
+        print(f"Started worker pool with {len(self.processes)} local and {len(self._remote_workers)} remote workers.")
+
+    def _start_local(self, worker_id):
+        process = self.context.Process(
+            target=worker_loop,
+            args=(worker_id, self.broker.inbox(worker_id), self.broker.results(), self.settings,
+                  self.analyzer_factory, self.shard_runner),
+            daemon=True,
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.alive.add(worker_id)
+
+    def _respawn_dead(self):
+        """
+        Restarts local workers whose process has exited, so a crash does not shrink the pool for good.
+        """
+        exited = [worker_id for worker_id, process in self.processes.items() if not process.is_alive()]
+        if not exited:
+            return
+        shared = isinstance(self.analyzer_factory, SharedAnalyzer)
+        if shared:
+            gc.collect()
+            gc.freeze()
+        for worker_id in exited:
+            print(f"Worker {worker_id} exited. Restarting it.")
+            self.processes[worker_id].join(timeout=0)
+            self._start_local(worker_id)
+        if shared:
+            gc.unfreeze()
+
+    def stop(self):
+        for worker_id in list(self.processes) + self._remote_workers:
+            self.broker.inbox(worker_id).put(None)
+        for process in self.processes.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.alive.clear()
+
+    def memory_report(self):
+        """
+        Returns printable memory usage lines for the coordinator and every worker that reported it.
+        """
+        return format_memory_report(dict(self.memory, coordinator=memory_usage()))
+
+    def _is_alive(self, worker_id):
+        process = self.processes.get(worker_id)
+        return worker_id in self.alive and (process is None or process.is_alive())
+
+    def _mark_dead(self, worker_id):
+        if worker_id in self.alive:
+            print(f"Worker {worker_id} is unresponsive. Rebalancing its symbols.")
+            self.alive.discard(worker_id)
+
+    def _handle_message(self, message, pending, results):
+        kind, worker_id, task_id, payload = message
+        # Any message proves the worker is responsive again, e.g. a slow worker that missed the
+        # shard timeout once or a restarted remote worker.
+        process = self.processes.get(worker_id)
+        if worker_id not in self.alive and (process is None or process.is_alive()):
+            print(f"Worker {worker_id} is responsive again.")
+            self.alive.add(worker_id)
+        if kind in ('ready', 'memory'):
+            self.memory[worker_id] = payload
+        elif kind == 'done' and task_id in pending:
+            del pending[task_id]
+            results.extend(payload)
+
+    def news_queries(self, symbols):
+        """
+        Returns a dict mapping each symbol to its news query (see news_query_for).
+        """
+        default_query = self.settings.get('news_query', 'Bitcoin')
+        return {symbol: news_query_for(symbol, self.settings.get('news_queries'), default_query)
+                for symbol in symbols}
+
+    def _live_workers(self):
+        return sorted(worker_id for worker_id in self.alive if self._is_alive(worker_id))
+
+    def _score_news(self, headlines_by_query):
+        """
+        Has one worker score the headlines of every query, moving on to the next worker if it dies
+        or misses the shard timeout.
+
+        :return: A dict mapping each query to its sentiment score; empty if no worker could score them.
+        """
+        headlines_by_query = {query: headlines for query, headlines in headlines_by_query.items() if headlines}
+        if not headlines_by_query:
+            return {}
+        result_queue = self.broker.results()
+        while True:
+            workers = self._live_workers()
+            if not workers:
+                print("No live workers to score the news. Using neutral sentiment.")
+                return {}
+            worker_id = workers[0]
+            task_id = self._next_task_id
+            self._next_task_id += 1
+            self.broker.inbox(worker_id).put((task_id, 'score', headlines_by_query))
+            deadline = time.monotonic() + self.shard_timeout
+            while time.monotonic() < deadline and self._is_alive(worker_id):
+                try:
+                    message = result_queue.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                self._handle_message(message, {}, [])
+                kind, _, reply_id, payload = message
+                if kind == 'scores' and reply_id == task_id:
+                    return payload
+            self._mark_dead(worker_id)
+
+    def _dispatch(self, symbols, pending):
+        workers = self._live_workers()
+        if not workers:
+            return False
+        deadline = time.monotonic() + self.shard_timeout
+        for worker_id, shard in assign_shards(symbols, workers).items():
+            task_id = self._next_task_id
+            self._next_task_id += 1
+            pending[task_id] = (worker_id, shard, deadline)
+            sentiment_by_symbol = {symbol: self._sentiment_by_symbol.get(symbol, 0.0) for symbol in shard}
+            self.broker.inbox(worker_id).put((task_id, 'shard', (shard, sentiment_by_symbol)))
+        return True
+
+    def run_cycle(self, symbols, headlines_by_query=None):
+        """
+        Analyzes every symbol once across the pool.
+
+        :param symbols: The symbol universe for this cycle.
+        :param headlines_by_query: A dict mapping each news query of the symbols (see news_queries)
+                                   to this cycle's headlines. Each query is scored once, by one
+                                   worker. Without it, every symbol gets neutral sentiment.
+        :return: A list of per-symbol results (see run_shard). Symbols are missing only if every worker died.
+        """
+        pending = {}
+        results = []
+        result_queue = self.broker.results()
+        self._respawn_dead()
+        # Messages that arrived between cycles (e.g. late results) can re-admit workers before dispatching
+        while True:
+            try:
+                self._handle_message(result_queue.get_nowait(), pending, results)
+            except queue.Empty:
+                break
+        scores = self._score_news(headlines_by_query or {})
+        self._sentiment_by_symbol = {symbol: scores.get(query, 0.0)
+                                     for symbol, query in self.news_queries(symbols).items()}
+        if not self._dispatch(symbols, pending):
+            print("No live workers. Skipping this cycle.")
+            return []
+
+        while pending:
+            try:
+                self._handle_message(result_queue.get(timeout=0.2), pending, results)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            orphaned = []
+            for task_id, (worker_id, shard, deadline) in list(pending.items()):
+                if now > deadline or not self._is_alive(worker_id):
+                    self._mark_dead(worker_id)
+                    orphaned.extend(shard)
+                    del pending[task_id]
+            if orphaned and not self._dispatch(orphaned, pending):
+                print(f"No live workers left. {len(orphaned)} symbols were not analyzed.")
+                break
+        return results
+
+if __name__ == '__main__':
+    # Runs a remote worker that serves shards from a coordinator's broker:
+    # python3 -m src.workers.pool <broker host:port> <worker id>
+    # The coordinator must list the same worker id in BOTPY_REMOTE_WORKERS.
+    if len(sys.argv) < 3:
+        print("Usage: python3 -m src.workers.pool <broker host:port> <worker id>")
+        sys.exit(1)
+
+    authkey = os.environ.get('BOTPY_BROKER_AUTHKEY', '')
+    if not authkey:
+        print("BOTPY_BROKER_AUTHKEY must be set to the coordinator's broker secret.")
+        sys.exit(1)
+
+    remote_broker = RemoteBroker(parse_address(sys.argv[1]), authkey.encode())
+    worker_settings = {
+        'exchange_name': os.environ.get('BOTPY_EXCHANGE', 'kucoin'),
+        'timeframe': os.environ.get('BOTPY_TIMEFRAME', '1h'),
+        'limit': int(os.environ.get('BOTPY_DATA_LIMIT', '200')),
+        'snapshot_path': os.environ.get('BOTPY_SNAPSHOT_PATH'),
+    }
+    analyzer_options = {'cache_size': int(os.environ.get('BOTPY_HEADLINE_CACHE_SIZE', '5000'))}
+    if os.environ.get('BOTPY_SENTIMENT_CASCADE') == '1':
+        analyzer_options.update(fast_tiers=[LexiconScorer()],
+                                confidence_cutoff=float(os.environ.get('BOTPY_CASCADE_CUTOFF', '0.6')))
+    worker_loop(sys.argv[2], remote_broker.inbox(sys.argv[2]), remote_broker.results(), worker_settings,
+                analyzer_factory=functools.partial(SentimentAnalyzer, **analyzer_options))
@@ -0,0 +1,106 @@
+import unittest
+import os
+import csv
+import json
+import tempfile
+
+from src.sentiment_analysis.backfill import run_backfill, load_backfill, read_articles
+
+class KeywordAnalyzer:
+    """A stand-in for SentimentAnalyzer: 'surge' is positive, 'crash' is negative."""
+    model = object()
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_probabilities(self, headlines):
+        self.batches.append(list(headlines))
+        return [(0.8, 0.1, 0.1) if 'surge' in h else (0.1, 0.8, 0.1) if 'crash' in h else (0.1, 0.1, 0.8)
+                for h in headlines]
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmpdir.name, 'articles.jsonl')
+        self.output_dir = os.path.join(self.tmpdir.name, 'out')
+        words = ['surge', 'crash', 'steady']
+        self.articles = [{'title': f'Bitcoin {words[i % 3]} {i}', 'publishedAt': f'2024-01-01T{i % 24:02d}:00:00Z'}
+                         for i in range(50)]
+        with open(self.input_path, 'w') as f:
+            for article in self.articles:
+                f.write(json.dumps(article) + '\n')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read_articles_csv(self):
+        """Tests that CSV dumps are streamed with the configured fields."""
+        csv_path = os.path.join(self.tmpdir.name, 'articles.csv')
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['publishedAt', 'title'])
+            writer.writeheader()
+            writer.writerows(self.articles[:2])
+        self.assertEqual(list(read_articles(csv_path)),
+                         [('2024-01-01T00:00:00Z', 'Bitcoin surge 0'), ('2024-01-01T01:00:00Z', 'Bitcoin crash 1')])
+
+    def test_backfill_writes_time_indexed_probabilities(self):
+        """Tests that every article is scored once, in model batches, into a time-indexed frame."""
+        analyzer = KeywordAnalyzer()
+        count = run_backfill(self.input_path, self.output_dir, workers=1, chunk_size=20, batch_size=8,
+                             analyzer=analyzer)
+        frame = load_backfill(self.output_dir)
+
+        self.assertEqual(count, 50)
+        self.assertEqual(len(frame), 50)
+        self.assertTrue(frame.index.is_monotonic_increasing)
+        self.assertLessEqual(max(len(batch) for batch in analyzer.batches), 8)
+        surge = frame[frame['title'] == 'Bitcoin surge 0'].iloc[0]
+        self.assertAlmostEqual(surge['score'], 0.7)
+        self.assertEqual(sorted(frame['row']), list(range(50)))
+
+    def test_backfill_resumes_from_checkpoint(self):
+        """Tests that a second run only scores articles added since the checkpoint."""
+        run_backfill(self.input_path, self.output_dir, workers=1, chunk_size=20, analyzer=KeywordAnalyzer())
+        with open(self.input_path, 'a') as f:
+            f.write(json.dumps({'title': 'Bitcoin surge late', 'publishedAt': '2024-01-02T00:00:00Z'}) + '\n')
+
+        analyzer = KeywordAnalyzer()
+        count = run_backfill(self.input_path, self.output_dir, workers=1, chunk_size=20, analyzer=analyzer)
+
+        self.assertEqual(count, 1)
+        self.assertEqual(analyzer.batches, [['Bitcoin surge late']])
+        self.assertEqual(len(load_backfill(self.output_dir)), 51)
+
+    def test_backfill_parses_mixed_time_formats(self):
+        """Tests that ISO 8601 variants and RFC 2822 times are all parsed, and unparseable ones are counted."""
+        with open(self.input_path, 'w') as f:
+            for published_at in ['2024-01-01T00:00:00Z', '2024-01-01T05:00:00.123Z',
+                                 'Mon, 01 Jan 2024 06:00:00 GMT', 'yesterday']:
+                f.write(json.dumps({'title': 'Bitcoin steady', 'publishedAt': published_at}) + '\n')
+
+        run_backfill(self.input_path, self.output_dir, workers=1, analyzer=KeywordAnalyzer())
+        frame = load_backfill(self.output_dir)
+        with open(os.path.join(self.output_dir, '_checkpoint.json')) as f:
+            checkpoint = json.load(f)
+
+        self.assertEqual(len(frame), 4)
+        self.assertEqual([str(t) for t in frame.index[:3]],
+                         ['2024-01-01 00:00:00+00:00', '2024-01-01 05:00:00.123000+00:00',
+                          '2024-01-01 06:00:00+00:00'])
+        self.assertEqual(checkpoint['unparsed_times'], 1)
+
+    def test_backfill_in_parallel(self):
+        """Tests that forked workers produce the same result as a single process."""
+        run_backfill(self.input_path, self.output_dir, workers=3, chunk_size=7, analyzer=KeywordAnalyzer())
+        parallel = load_backfill(self.output_dir).sort_values('row')
+
+        serial_dir = os.path.join(self.tmpdir.name, 'serial')
+        run_backfill(self.input_path, serial_dir, workers=1, chunk_size=7, analyzer=KeywordAnalyzer())
+        serial = load_backfill(serial_dir).sort_values('row')
+
+        self.assertEqual(parallel['row'].tolist(), serial['row'].tolist())
+        self.assertEqual(parallel['score'].tolist(), serial['score'].tolist())
+
+if __name__ == '__main__':
+    unittest.main()
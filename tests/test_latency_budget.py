@@ -0,0 +1,187 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from src.data_acquisition.exchange import ohlcv_to_dataframe
+from src.latency.budget import LatencyBudget, describe_freshness
+import src.main as pipeline
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_candles():
+    return ohlcv_to_dataframe([[1622505600000 + i * 3600000, 100.0, 101.0, 99.0, 100.0 + i, 10.0]
+                               for i in range(60)])
+
+class TestLatencyBudget(unittest.TestCase):
+
+    def test_stage_timeout_capped_by_cycle(self):
+        """Tests that a stage gets the smaller of its own deadline and what is left of the cycle."""
+        clock = FakeClock()
+        budget = LatencyBudget(cycle_seconds=30, stage_seconds={'news': 20, 'alert': 10}, clock=clock)
+        budget.start_cycle()
+        self.assertEqual(budget.timeout_for('news'), 20)
+        clock.now = 25
+        self.assertEqual(budget.timeout_for('news'), 5)
+        self.assertEqual(budget.timeout_for('candles'), 5)
+        clock.now = 40
+        self.assertEqual(budget.timeout_for('news'), 0)
+        self.assertEqual(budget.timeout_for('alert', critical=True), 10)
+
+    def test_no_limits_by_default(self):
+        """Tests that a default budget never times out or sheds."""
+        budget = LatencyBudget()
+        budget.start_cycle()
+        self.assertIsNone(budget.timeout_for('candles'))
+        self.assertTrue(budget.should_run('bbands'))
+
+    def test_shedding_order(self):
+        """Tests that Bollinger Bands are shed before sentiment."""
+        clock = FakeClock()
+        budget = LatencyBudget(cycle_seconds=60, shed_below_seconds={'bbands': 10, 'sentiment': 5}, clock=clock)
+        budget.start_cycle()
+        clock.now = 52
+        self.assertFalse(budget.should_run('bbands'))
+        self.assertTrue(budget.should_run('sentiment'))
+        clock.now = 56
+        self.assertFalse(budget.should_run('sentiment'))
+
+    def test_fallback_respects_staleness_limit(self):
+        """Tests that fallback values expire after their staleness limit."""
+        clock = FakeClock()
+        budget = LatencyBudget(max_stale_seconds={'sentiment': 100}, clock=clock)
+        budget.remember('sentiment', 'Bitcoin', 0.4)
+        clock.now = 50
+        self.assertEqual(budget.fallback('sentiment', 'Bitcoin'), (0.4, 50))
+        clock.now = 150
+        self.assertEqual(budget.fallback('sentiment', 'Bitcoin'), (None, None))
+        self.assertEqual(budget.fallback('candles', 'BTC/USDT'), (None, None))
+
+    def test_run_times_out(self):
+        """Tests that a blocking call over its deadline is abandoned."""
+        budget = LatencyBudget(stage_seconds={'news': 0.05})
+        budget.start_cycle()
+
+        async def timed_run():
+            started = time.monotonic()
+            outcome = await budget.run('news', time.sleep, 0.5)
+            return outcome, time.monotonic() - started
+
+        (result, timed_out), elapsed = asyncio.run(timed_run())
+        self.assertTrue(timed_out)
+        self.assertIsNone(result)
+        self.assertLess(elapsed, 0.5)
+
+    def test_describe_freshness(self):
+        self.assertEqual(describe_freshness({'candles': 0.0, 'sentiment': 720.0, 'bbands': 'skipped'}),
+                         'candles fresh, sentiment 12m old, bbands skipped')
+
+    def test_check_for_signals_falls_back_to_stale_inputs(self):
+        """Tests that a hung exchange and NewsAPI fall back to the previous cycle's inputs."""
+        budget = LatencyBudget(cycle_seconds=5, stage_seconds={'candles': 0.05, 'news': 0.05})
+        analyzer = MagicMock()
+        analyzer.analyze_sentiment.return_value = 0.5
+        snapshot = MagicMock()
+
+        def hung(**kwargs):
+            time.sleep(0.3)
+
+        with patch.object(pipeline, 'fetch_ohlcv', return_value=make_candles()), \
+             patch.object(pipeline, 'fetch_news_headlines', return_value=['Headline']), \
+             patch.object(pipeline, 'send_message', new=AsyncMock(return_value=True)):
+            asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', budget=budget))
+
+        with patch.object(pipeline, 'fetch_ohlcv', side_effect=hung), \
+             patch.object(pipeline, 'fetch_news_headlines', side_effect=hung), \
+             patch.object(pipeline, 'send_message', new=AsyncMock(return_value=True)):
+            signal = asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', budget=budget,
+                                                            snapshot=snapshot))
+
+        self.assertIsNotNone(signal)
+        analyzer.analyze_sentiment.assert_called_once()
+        reading = snapshot.publish.call_args.args[0]['BTC/USDT']
+        self.assertEqual(reading['sentiment'], 0.5)
+        self.assertGreater(reading['freshness']['candles'], 0)
+        self.assertGreater(reading['freshness']['sentiment'], 0)
+
+    def test_check_for_signals_falls_back_when_news_fetch_fails(self):
+        """Tests that a failed news fetch reuses the last score, and neutral sentiment is labelled unavailable."""
+        budget = LatencyBudget()
+        analyzer = MagicMock()
+        analyzer.analyze_sentiment.return_value = 0.8
+        snapshot = MagicMock()
+
+        with patch.object(pipeline, 'fetch_ohlcv', return_value=make_candles()), \
+             patch.object(pipeline, 'send_message', new=AsyncMock(return_value=True)):
+            with patch.object(pipeline, 'fetch_news_headlines', return_value=['Headline']):
+                asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', budget=budget))
+            # fetch_news_headlines returns [] when NewsAPI fails
+            with patch.object(pipeline, 'fetch_news_headlines', return_value=[]):
+                asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', budget=budget, snapshot=snapshot))
+                reading = snapshot.publish.call_args.args[0]['BTC/USDT']
+                self.assertEqual(reading['sentiment'], 0.8)
+                self.assertNotEqual(reading['freshness']['sentiment'], 0.0)
+
+                asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', budget=LatencyBudget(),
+                                                       snapshot=snapshot))
+                reading = snapshot.publish.call_args.args[0]['BTC/USDT']
+                self.assertEqual(reading['sentiment'], 0.0)
+                self.assertEqual(reading['freshness']['sentiment'], 'unavailable')
+
+    def test_fallback_never_reuses_a_partial_candle(self):
+        """Tests that candles kept as a fallback mid-candle do not put a partial close into the indicator cache."""
+        def frame(final_close):
+            df = make_candles()
+            df.iloc[-1, df.columns.get_loc('close')] = final_close
+            df.attrs.update(exchange='kucoin', symbol='BTC/USDT', timeframe='1h')
+            return df
+
+        last_open = make_candles().index[-1].timestamp()
+        budget = LatencyBudget()
+        analyzer = MagicMock()
+        analyzer.analyze_sentiment.return_value = 0.0
+        snapshot = MagicMock()
+        pipeline.indicator_cache.clear()
+
+        def run(fetched, now):
+            with patch.object(pipeline, 'fetch_ohlcv', return_value=fetched), \
+                 patch('src.data_acquisition.exchange.time.time', return_value=now), \
+                 patch.object(pipeline, 'fetch_news_headlines', return_value=['Headline']), \
+                 patch.object(pipeline, 'send_message', new=AsyncMock(return_value=True)):
+                asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', budget=budget, snapshot=snapshot))
+            return snapshot.publish.call_args.args[0]['BTC/USDT']
+
+        run(frame(100.0), last_open + 600)  # The last candle is still forming at 100
+        run(None, last_open + 4000)         # The exchange fails after it closed
+        reading = run(frame(120.0), last_open + 4200)
+
+        expected = frame(120.0)
+        expected.ta.rsi(length=14, append=True)
+        self.assertAlmostEqual(reading['rsi'], expected['RSI_14'].iloc[-1])
+
+    def test_check_for_signals_sheds_bollinger_bands_first(self):
+        """Tests that a nearly exhausted cycle skips Bollinger Bands but keeps the signal."""
+        clock = FakeClock()
+        budget = LatencyBudget(cycle_seconds=60, shed_below_seconds={'bbands': 1000, 'sentiment': 0},
+                               clock=clock)
+        analyzer = MagicMock()
+        analyzer.analyze_sentiment.return_value = 0.1
+        snapshot = MagicMock()
+        with patch.object(pipeline, 'fetch_ohlcv', return_value=make_candles()), \
+             patch.object(pipeline, 'fetch_news_headlines', return_value=['Headline']), \
+             patch.object(pipeline, 'add_bollinger_bands') as mock_bbands:
+            signal = asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', budget=budget,
+                                                            snapshot=snapshot))
+
+        self.assertEqual(signal, 'hold')
+        mock_bbands.assert_not_called()
+        analyzer.analyze_sentiment.assert_called_once()
+        self.assertEqual(snapshot.publish.call_args.args[0]['BTC/USDT']['freshness']['bbands'], 'skipped')
+
+if __name__ == '__main__':
+    unittest.main()
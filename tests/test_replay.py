@@ -0,0 +1,131 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from src.data_acquisition.exchange import ohlcv_to_dataframe, dataframe_to_ohlcv
+from src.replay.recorder import CycleRecorder, read_cycles
+from src.replay.player import replay_log
+from src.latency.budget import LatencyBudget
+import src.main as pipeline
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        """Create sample candles and a temporary log path."""
+        self.ohlcv = [
+            [1622505600000 + i * 3600000, 100 + i, 101 + i, 99 + i, 100 + i, 10 + i]
+            for i in range(60)
+        ]
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmpdir.name, 'cycles.jsonl.gz')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _record(self, cycles=2):
+        """Runs the pipeline with mocked services and records each cycle."""
+        recorder = CycleRecorder(self.log_path)
+        analyzer = MagicMock()
+        analyzer.analyze_sentiment.return_value = 0.5
+        with patch.object(pipeline, 'fetch_ohlcv', side_effect=lambda **kw: ohlcv_to_dataframe(self.ohlcv)), \
+             patch.object(pipeline, 'fetch_news_headlines', return_value=['Headline 1', 'Headline 2']), \
+             patch.object(pipeline, 'send_message', new=AsyncMock(return_value=True)):
+            return [asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', recorder=recorder))
+                    for _ in range(cycles)]
+
+    def test_dataframe_round_trip(self):
+        """Tests that candles survive the DataFrame -> raw rows conversion unchanged."""
+        self.assertEqual(dataframe_to_ohlcv(ohlcv_to_dataframe(self.ohlcv)), self.ohlcv)
+
+    def test_record_cycles(self):
+        """Tests that each cycle's inputs and outputs are written to the log."""
+        signals = self._record(cycles=2)
+        cycles = list(read_cycles(self.log_path))
+
+        self.assertEqual(len(cycles), 2)
+        self.assertEqual(cycles[0]['candles'], self.ohlcv)
+        self.assertEqual(cycles[0]['headlines'], ['Headline 1', 'Headline 2'])
+        self.assertEqual(cycles[0]['sentiment'], 0.5)
+        self.assertEqual([c['signal'] for c in cycles], signals)
+
+    def test_replay_matches_recording(self):
+        """Tests that replaying a log reproduces the recorded signals."""
+        self._record(cycles=3)
+        report = asyncio.run(replay_log(self.log_path))
+
+        self.assertEqual(report['cycles'], 3)
+        self.assertEqual(report['mismatches'], [])
+        self.assertGreater(report['cycles_per_second'], 0)
+
+    def test_concurrent_replays_do_not_touch_pipeline_globals(self):
+        """Tests that replays inject their stand-ins instead of patching src.main, so they can run concurrently."""
+        self._record(cycles=2)
+        live_fetch = pipeline.fetch_ohlcv
+
+        async def replay_twice():
+            return await asyncio.gather(replay_log(self.log_path), replay_log(self.log_path))
+
+        reports = asyncio.run(replay_twice())
+        self.assertEqual([r['mismatches'] for r in reports], [[], []])
+        self.assertIs(pipeline.fetch_ohlcv, live_fetch)
+
+    def test_replay_uses_recorded_fallback_sentiment(self):
+        """Tests that a cycle whose news fetch failed replays with the fallback score it used live."""
+        recorder = CycleRecorder(self.log_path)
+        analyzer = MagicMock()
+        analyzer.analyze_sentiment.return_value = 0.5
+        budget = LatencyBudget(max_stale_seconds={'sentiment': 3600})
+        signal_for = lambda df, sentiment_score: 'buy' if sentiment_score > 0.3 else 'hold'
+        with patch.object(pipeline, 'fetch_ohlcv', side_effect=lambda **kw: ohlcv_to_dataframe(self.ohlcv)), \
+             patch.object(pipeline, 'fetch_news_headlines', side_effect=[['Headline 1'], []]), \
+             patch.object(pipeline, 'generate_signal', side_effect=signal_for), \
+             patch.object(pipeline, 'send_message', new=AsyncMock(return_value=True)):
+            signals = [asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', recorder=recorder, budget=budget))
+                       for _ in range(2)]
+            cycles = list(read_cycles(self.log_path))
+            self.assertEqual(signals, ['buy', 'buy'])
+            self.assertEqual(cycles[0]['sentiment_freshness'], 0.0)
+            self.assertEqual(cycles[1]['headlines'], [])
+            self.assertGreater(cycles[1]['sentiment_freshness'], 0.0)
+
+            report = asyncio.run(replay_log(self.log_path))
+        self.assertEqual(report['mismatches'], [])
+
+    def test_replay_detects_mismatch(self):
+        """Tests that a cycle whose recorded signal differs is reported."""
+        self._record(cycles=1)
+        cycle = next(read_cycles(self.log_path))
+        cycle['signal'] = 'sell' if cycle['signal'] != 'sell' else 'buy'
+        tampered_path = os.path.join(self.tmpdir.name, 'tampered.jsonl')
+        with open(tampered_path, 'w') as f:
+            f.write(json.dumps(cycle) + '\n')
+
+        report = asyncio.run(replay_log(tampered_path))
+        self.assertEqual(len(report['mismatches']), 1)
+
+    def test_replay_compares_messages_without_freshness(self):
+        """Tests that alert texts are compared, except for their input freshness line."""
+        with patch.object(pipeline, 'generate_signal', return_value='buy'):
+            self._record(cycles=1)
+            cycle = next(read_cycles(self.log_path))
+            self.assertEqual(len(cycle['messages']), 1)
+
+            # A different input age alone is not a mismatch
+            stale = dict(cycle, messages=[cycle['messages'][0] + 'Inputs: candles 5m old\n'])
+            stale_path = os.path.join(self.tmpdir.name, 'stale.jsonl')
+            with open(stale_path, 'w') as f:
+                f.write(json.dumps(stale) + '\n')
+            self.assertEqual(asyncio.run(replay_log(stale_path))['mismatches'], [])
+
+            # A different alert text is
+            tampered = dict(cycle, messages=[cycle['messages'][0].replace('BUY', 'SELL')])
+            tampered_path = os.path.join(self.tmpdir.name, 'tampered.jsonl')
+            with open(tampered_path, 'w') as f:
+                f.write(json.dumps(tampered) + '\n')
+            self.assertEqual(len(asyncio.run(replay_log(tampered_path))['mismatches']), 1)
+
+if __name__ == '__main__':
+    unittest.main()
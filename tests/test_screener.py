@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src.data_acquisition.exchange import fetch_tickers
+from src.data_acquisition.screener import TickerScreener
+
+def ticker(last, quote_volume=1000000, bid=None, ask=None):
+    return {'last': last, 'quoteVolume': quote_volume, 'bid': bid, 'ask': ask}
+
+class TestScreener(unittest.TestCase):
+
+    def setUp(self):
+        self.screener = TickerScreener(min_move_pct=1.0, min_quote_volume=100000, max_spread_pct=0.5,
+                                       max_stale_seconds=3600)
+
+    def test_new_liquid_symbols_pass(self):
+        """Tests that liquid symbols that were never analyzed pass, and unscreenable ones are kept."""
+        tickers = {'BTC/USDT': ticker(100.0), 'ETH/USDT': ticker(10.0)}
+        selected = self.screener.select(['BTC/USDT', 'ETH/USDT', 'NEW/USDT'], tickers, now=0)
+        self.assertEqual(selected, ['BTC/USDT', 'ETH/USDT', 'NEW/USDT'])
+
+    def test_illiquid_symbols_are_filtered(self):
+        """Tests the volume and spread thresholds."""
+        tickers = {
+            'LOW/USDT': ticker(1.0, quote_volume=500),
+            'WIDE/USDT': ticker(1.0, bid=0.98, ask=1.02),
+            'TIGHT/USDT': ticker(1.0, bid=0.999, ask=1.001),
+        }
+        self.assertEqual(self.screener.select(list(tickers), tickers, now=0), ['TIGHT/USDT'])
+
+    def test_unmoved_symbols_skipped_until_stale(self):
+        """Tests that analyzed symbols only pass again after a move or once their data is stale."""
+        self.screener.mark_analyzed('BTC/USDT', 100.0, now=0)
+        self.screener.mark_analyzed('ETH/USDT', 10.0, now=0)
+        tickers = {'BTC/USDT': ticker(100.5), 'ETH/USDT': ticker(10.2)}
+
+        self.assertEqual(self.screener.select(['BTC/USDT', 'ETH/USDT'], tickers, now=60), ['ETH/USDT'])
+        self.assertEqual(self.screener.select(['BTC/USDT', 'ETH/USDT'], tickers, now=3600),
+                         ['BTC/USDT', 'ETH/USDT'])
+
+    def test_moves_are_measured_from_the_screened_ticker(self):
+        """Tests that a symbol analyzed after a move does not keep passing until its candle closes."""
+        self.screener.mark_analyzed('BTC/USDT', 100.0, now=0)
+        moved = {'BTC/USDT': ticker(102.0)}
+        self.assertEqual(self.screener.select(['BTC/USDT'], moved, now=300), ['BTC/USDT'])
+        # The analysis reports the last closed candle's close (100), but the ticker price is recorded
+        self.screener.mark_analyzed('BTC/USDT', now=300)
+        self.assertEqual(self.screener.select(['BTC/USDT'], moved, now=600), [])
+
+    @patch('src.data_acquisition.exchange.getattr')
+    def test_fetch_tickers_single_request(self, mock_getattr):
+        """Tests that fetch_tickers makes one bulk request and keeps only the requested symbols."""
+        mock_exchange = MagicMock()
+        mock_exchange.fetch_tickers.return_value = {'BTC/USDT': ticker(1.0), 'XRP/USDT': ticker(2.0)}
+        mock_getattr.return_value = MagicMock(return_value=mock_exchange)
+
+        tickers = fetch_tickers('kucoin', ['BTC/USDT'])
+
+        self.assertEqual(list(tickers), ['BTC/USDT'])
+        mock_exchange.fetch_tickers.assert_called_once_with(['BTC/USDT'])
+
+if __name__ == '__main__':
+    unittest.main()
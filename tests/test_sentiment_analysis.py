@@ -8,6 +8,9 @@ from src.sentiment_analysis.news_fetcher import fetch_news_headlines
 from src.sentiment_analysis.analyzer import SentimentAnalyzer
 import torch
 
+# Test Cascade
+from src.sentiment_analysis.cascade import LexiconScorer, SentimentCascade
+
 class TestSentimentAnalysis(unittest.TestCase):
 
     @patch('src.sentiment_analysis.news_fetcher.NewsApiClient')
@@ -89,6 +92,153 @@ class TestSentimentAnalysis(unittest.TestCase):
         score_positive = analyzer.analyze_sentiment(headlines)
         self.assertGreater(score_positive, 0)
 
+    @patch('src.sentiment_analysis.analyzer.AutoModelForSequenceClassification.from_pretrained')
+    @patch('src.sentiment_analysis.analyzer.AutoTokenizer.from_pretrained')
+    def test_sentiment_analyzer_score_cache(self, MockTokenizer, MockModel):
+        """
+        Tests that cached headlines are not sent through the model again.
+        """
+        mock_tokenizer = MockTokenizer.return_value
+        mock_model_instance = MockModel.return_value
+        mock_output = MagicMock()
+        mock_model_instance.return_value = mock_output
+
+        analyzer = SentimentAnalyzer(cache_size=10)
+
+        mock_output.logits = torch.tensor([[0.9, 0.1, 0.0], [0.1, 0.9, 0.0]])
+        first_score = analyzer.analyze_sentiment(["Old story", "Other story"])
+
+        # Only the new headline should be tokenized on the second call
+        mock_output.logits = torch.tensor([[0.9, 0.1, 0.0]])
+        second_score = analyzer.analyze_sentiment(["Old story", "Other story", "New story"])
+
+        self.assertEqual(mock_tokenizer.call_args_list[-1].args[0], ["New story"])
+        self.assertEqual(len(analyzer.score_cache), 3)
+        self.assertGreater(second_score, first_score)
+
+    @patch('src.sentiment_analysis.analyzer.AutoModelForSequenceClassification.from_pretrained')
+    @patch('src.sentiment_analysis.analyzer.AutoTokenizer.from_pretrained')
+    def test_sentiment_analyzer_cascade(self, MockTokenizer, MockModel):
+        """
+        Tests that only headlines the lexicon is unsure about are sent through the model.
+        """
+        mock_tokenizer = MockTokenizer.return_value
+        mock_output = MagicMock()
+        MockModel.return_value.return_value = mock_output
+        mock_output.logits = torch.tensor([[0.0, 3.0, 0.0]])
+
+        analyzer = SentimentAnalyzer(fast_tiers=[LexiconScorer()], confidence_cutoff=0.6)
+        score = analyzer.analyze_sentiment(["Bitcoin surges to record high as bulls rally",
+                                            "Exchange outlines roadmap for next year"])
+
+        self.assertEqual(mock_tokenizer.call_args_list[-1].args[0], ["Exchange outlines roadmap for next year"])
+        stats = analyzer.cascade.stats()
+        self.assertEqual(stats['lexicon']['accepted'], 1)
+        self.assertEqual(stats['finbert']['accepted'], 1)
+        # 0.9 from the lexicon averaged with a strongly negative model score
+        self.assertLess(abs(score), 0.1)
+
+class FakeTier:
+    def __init__(self, name, results):
+        self.name = name
+        self.results = results
+        self.calls = []
+
+    def score(self, headlines):
+        self.calls.append(list(headlines))
+        return [self.results[h] for h in headlines]
+
+# Fixed (score, confidence) outputs in the range FinBERT gives, used as the reference for calibration
+FINBERT_REFERENCE = {
+    "Bitcoin surges to record high as ETF inflows jump": (0.93, 0.95),
+    "Ether plunges after exchange hack": (-0.95, 0.96),
+    "Crypto lender files for bankruptcy amid sell-off": (-0.90, 0.93),
+    "Solana rallies as developer adoption climbs": (0.88, 0.90),
+    "Profit-taking drags Bitcoin lower": (-0.78, 0.82),
+    "Crypto lender avoids bankruptcy": (0.35, 0.60),
+    "Bitcoin ETF inflows slow": (-0.42, 0.55),
+    "Regulator opens investigation into exchange": (-0.70, 0.80),
+    "Bitcoin rose overnight": (0.60, 0.70),
+    "Miners sell as hashprice falls": (-0.55, 0.70),
+    "Exchange outlines roadmap for next year": (0.05, 0.85),
+}
+
+class TestSentimentCascade(unittest.TestCase):
+
+    def test_lexicon_scorer(self):
+        """
+        Tests lexicon scores and that conflicting, negated or unknown headlines get low confidence.
+        """
+        scorer = LexiconScorer()
+        (up, up_conf), (down, down_conf), (mixed, mixed_conf), (negated, negated_conf), (_, unknown_conf) = \
+            scorer.score(["Bitcoin surges to record high", "Ether plunges after exchange hack",
+                          "Stocks rally but crypto drops", "Bitcoin is not crashing, bulls say",
+                          "Exchange outlines roadmap"])
+
+        self.assertGreater(up, 0)
+        self.assertLess(down, 0)
+        self.assertGreaterEqual(min(up_conf, down_conf), 0.6)
+        self.assertEqual(mixed, 0)
+        self.assertLess(mixed_conf, 0.6)
+        self.assertEqual((negated, negated_conf), (0.0, 0.0))
+        self.assertEqual(unknown_conf, 0.0)
+
+    def test_lexicon_scorer_single_term_headlines(self):
+        """
+        Tests that single terms are matched in irregular and doubled-consonant forms, but stay below the cutoff.
+        """
+        scorer = LexiconScorer()
+        headlines = ["Bitcoin rose overnight", "Ether fell 5%", "Prices rising", "Exchange banned in China",
+                     "Solana dropped", "Altcoins rallied"]
+        results = scorer.score(headlines)
+        self.assertEqual([score > 0 for score, _ in results], [True, False, True, False, False, True])
+        for headline, (_, confidence) in zip(headlines, results):
+            self.assertGreater(confidence, 0, headline)
+            self.assertLess(confidence, 0.6, headline)
+
+        # Two agreeing terms pass the cutoff
+        self.assertGreaterEqual(scorer.score(["Bitcoin surges to record high"])[0][1], 0.6)
+
+    def test_cascade_matches_finbert_only_scores(self):
+        """
+        Tests that the default lexicon cascade gives nearly the same aggregate score as FinBERT alone on a
+        fixed headline set, and that headlines a single term would misread reach the model.
+        """
+        headlines = list(FINBERT_REFERENCE)
+        finbert_only = [score for score, _ in FakeTier('finbert', FINBERT_REFERENCE).score(headlines)]
+        finbert = FakeTier('finbert', FINBERT_REFERENCE)
+        cascade = SentimentCascade([LexiconScorer()], finbert, audit_every=0)
+        cascaded = cascade.score(headlines)
+
+        self.assertLess(abs(sum(cascaded) / len(cascaded) - sum(finbert_only) / len(finbert_only)), 0.02)
+        self.assertEqual(cascade.stats()['lexicon']['accepted'], 4)
+        for headline in ["Profit-taking drags Bitcoin lower", "Crypto lender avoids bankruptcy",
+                         "Bitcoin ETF inflows slow"]:
+            self.assertIn(headline, finbert.calls[0])
+        for headline, score, reference in zip(headlines, cascaded, finbert_only):
+            self.assertEqual(score > 0, reference > 0, headline)
+
+    def test_cascade_routing_and_agreement(self):
+        """
+        Tests that the cutoff decides which headlines reach the final tier and that audits measure agreement.
+        """
+        fast = FakeTier('fast', {'a': (0.9, 0.9), 'b': (-0.9, 0.8), 'c': (0.5, 0.3)})
+        final = FakeTier('final', {'a': (0.8, 0.9), 'b': (0.7, 0.9), 'c': (-0.4, 0.9)})
+        cascade = SentimentCascade([fast], final, confidence_cutoff=0.6, audit_every=1)
+
+        self.assertEqual(cascade.score(['a', 'b', 'c']), [0.9, -0.9, -0.4])
+        self.assertEqual(final.calls, [['c', 'a', 'b']])
+
+        stats = cascade.stats()
+        self.assertEqual(stats['fast']['accepted'], 2)
+        self.assertEqual(stats['fast']['agreement_rate'], 0.5)
+        self.assertEqual(stats['final']['accepted'], 1)
+        self.assertIsNone(stats['final']['agreement_rate'])
+
+        # A stricter cutoff sends everything to the final tier
+        strict = SentimentCascade([fast], final, confidence_cutoff=0.95, audit_every=0)
+        self.assertEqual(strict.score(['a', 'b']), [0.8, 0.7])
+
 
 if __name__ == '__main__':
     unittest.main()
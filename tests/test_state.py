@@ -0,0 +1,164 @@
+import unittest
+import asyncio
+import os
+import signal
+import tempfile
+from collections import OrderedDict
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from src.data_acquisition.exchange import ohlcv_to_dataframe, dataframe_to_ohlcv
+from src.state.snapshot import BotState
+import src.main as pipeline
+
+START_MS = 1622505600000
+HOUR_MS = 3600000
+
+def make_ohlcv(start, count):
+    return [[START_MS + i * HOUR_MS, 100.0 + i, 101.0 + i, 99.0 + i, 100.0 + i, 10.0]
+            for i in range(start, start + count)]
+
+class TestBotState(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'botpy.snapshot')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_merge_candles_keeps_window(self):
+        """Tests that new candles replace the open candle and the window stays within the limit."""
+        state = BotState()
+        now = (START_MS + 4 * HOUR_MS) / 1000
+        self.assertIsNone(state.candles_since('kucoin', 'BTC/USDT', '1h', 5, now=now))
+
+        state.merge_candles('kucoin', 'BTC/USDT', '1h', ohlcv_to_dataframe(make_ohlcv(0, 5)), limit=5, now=now)
+        self.assertEqual(state.candles_since('kucoin', 'BTC/USDT', '1h', 5, now=now), make_ohlcv(4, 1)[0][0])
+
+        delta = make_ohlcv(4, 3)
+        delta[0][4] = 999.0  # The previously open candle closed at a different price
+        df = state.merge_candles('kucoin', 'BTC/USDT', '1h', ohlcv_to_dataframe(delta), limit=5, now=now + 7200)
+
+        self.assertEqual(len(df), 5)
+        self.assertEqual(df['close'].iloc[-3], 999.0)
+        self.assertEqual(df['close'].iloc[-1], 106.0)
+
+    def test_stale_window_fetches_latest_candles(self):
+        """Tests that a window older than one fetch can cover is refetched from now, not from its end."""
+        state = BotState()
+        state.merge_candles('kucoin', 'BTC/USDT', '1h', ohlcv_to_dataframe(make_ohlcv(100, 200)), limit=200,
+                            now=(START_MS + 299 * HOUR_MS) / 1000)
+
+        # Restarted 700 hours later: fetching 200 candles from the last stored one would end at candle 498
+        now = (START_MS + 1000 * HOUR_MS) / 1000
+        self.assertIsNone(state.candles_since('kucoin', 'BTC/USDT', '1h', 200, now=now))
+
+        df = state.merge_candles('kucoin', 'BTC/USDT', '1h', ohlcv_to_dataframe(make_ohlcv(801, 200)), limit=200,
+                                 now=now)
+        self.assertEqual(len(df), 200)
+        self.assertEqual(dataframe_to_ohlcv(df)[0][0], make_ohlcv(801, 1)[0][0])
+
+        # A fetch that still ends before the current candle is not used as fresh data
+        state = BotState()
+        self.assertIsNone(state.merge_candles('kucoin', 'BTC/USDT', '1h', ohlcv_to_dataframe(make_ohlcv(300, 200)),
+                                              limit=200, now=now))
+        self.assertNotIn(('kucoin', 'BTC/USDT', '1h'), state.candles)
+
+    def test_merge_articles(self):
+        """Tests that articles are deduplicated and the cursor tracks the newest one."""
+        state = BotState()
+        state.merge_articles('Bitcoin', [{'title': 'A', 'publishedAt': '2024-01-01T00:00:00Z'}])
+        headlines = state.merge_articles('Bitcoin', [
+            {'title': 'B', 'publishedAt': '2024-01-02T00:00:00Z'},
+            {'title': 'A', 'publishedAt': '2024-01-01T00:00:00Z'},
+        ])
+        self.assertEqual(headlines, ['B', 'A'])
+        self.assertEqual(state.news_cursor('Bitcoin'), '2024-01-02T00:00:00Z')
+
+    def test_alert_deduplication(self):
+        """Tests that the same signal for the same candle is only alerted once."""
+        state = BotState()
+        self.assertTrue(state.is_new_alert('BTC/USDT', 'buy', '2024-01-01 00:00:00'))
+        state.record_alert('BTC/USDT', 'buy', '2024-01-01 00:00:00')
+        self.assertFalse(state.is_new_alert('BTC/USDT', 'buy', '2024-01-01 00:00:00'))
+        self.assertTrue(state.is_new_alert('BTC/USDT', 'buy', '2024-01-01 01:00:00'))
+
+    def test_snapshot_round_trip(self):
+        """Tests that a saved snapshot restores candles, news, alerts and scored headlines."""
+        state = BotState()
+        state.merge_candles('kucoin', 'BTC/USDT', '1h', ohlcv_to_dataframe(make_ohlcv(0, 3)), limit=10)
+        state.merge_articles('Bitcoin', [{'title': 'A', 'publishedAt': '2024-01-01T00:00:00Z'}])
+        state.record_alert('BTC/USDT', 'sell', '2024-01-01 00:00:00')
+        analyzer = MagicMock(score_cache=OrderedDict([('A', 0.5)]))
+
+        self.assertTrue(state.save(self.path, analyzer))
+        self.assertEqual([f for f in os.listdir(self.tmpdir.name)], ['botpy.snapshot'])
+
+        restored_analyzer = MagicMock(score_cache=OrderedDict())
+        restored = BotState.load(self.path, restored_analyzer)
+        self.assertEqual(restored.candles, state.candles)
+        self.assertEqual(restored.news, state.news)
+        self.assertFalse(restored.is_new_alert('BTC/USDT', 'sell', '2024-01-01 00:00:00'))
+        self.assertEqual(restored_analyzer.score_cache, {'A': 0.5})
+
+    def test_load_missing_or_corrupt_snapshot(self):
+        """Tests that a missing or unreadable snapshot yields an empty state."""
+        self.assertEqual(BotState.load(self.path).candles, {})
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot')
+        self.assertEqual(BotState.load(self.path).candles, {})
+
+    def test_check_for_signals_fetches_only_delta(self):
+        """Tests that the pipeline fetches from the last stored candle once state is warm."""
+        state = BotState()
+        analyzer = MagicMock()
+        analyzer.analyze_sentiment.return_value = 0.0
+        mock_fetch = MagicMock(side_effect=[ohlcv_to_dataframe(make_ohlcv(0, 60)),
+                                            ohlcv_to_dataframe(make_ohlcv(59, 2))])
+        with patch.object(pipeline, 'fetch_ohlcv', mock_fetch), \
+             patch('src.state.snapshot.time.time', return_value=(START_MS + 60 * HOUR_MS) / 1000), \
+             patch.object(pipeline, 'fetch_news_articles', return_value=[]), \
+             patch.object(pipeline, 'send_message', new=AsyncMock(return_value=True)):
+            asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', state=state))
+            asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', state=state))
+
+        self.assertIsNone(mock_fetch.call_args_list[0].kwargs['since'])
+        self.assertEqual(mock_fetch.call_args_list[1].kwargs['since'], make_ohlcv(59, 1)[0][0])
+        self.assertEqual(len(state.candles[('kucoin', 'BTC/USDT', '1h')]), 61)
+
+    def test_alert_is_persisted_immediately(self):
+        """Tests that a sent alert is on disk before the next periodic save, so a restart does not repeat it."""
+        state = BotState()
+        analyzer = MagicMock()
+        analyzer.analyze_sentiment.return_value = 0.5
+        with patch.object(pipeline, 'fetch_ohlcv', return_value=ohlcv_to_dataframe(make_ohlcv(0, 60))), \
+             patch('src.state.snapshot.time.time', return_value=(START_MS + 60 * HOUR_MS) / 1000), \
+             patch.object(pipeline, 'fetch_news_articles', return_value=[]), \
+             patch.object(pipeline, 'generate_signal', return_value='buy'), \
+             patch.multiple(pipeline, SNAPSHOT_PATH=self.path, TELEGRAM_BOT_TOKEN='token', TELEGRAM_CHAT_ID='chat'), \
+             patch.object(pipeline, 'send_message', new=AsyncMock(return_value=True)):
+            asyncio.run(pipeline.check_for_signals(analyzer, 'fake_key', state=state))
+
+        restored = BotState.load(self.path)
+        self.assertEqual(len(restored.last_signals), 1)
+        symbol, (signal, candle_time) = next(iter(restored.last_signals.items()))
+        self.assertFalse(restored.is_new_alert(symbol, signal, candle_time))
+
+    @unittest.skipUnless(hasattr(signal, 'SIGTERM') and os.name == 'posix', "SIGTERM handling is POSIX only")
+    def test_sigterm_runs_final_save(self):
+        """Tests that SIGTERM cancels the bot so its finally blocks (the final snapshot save) run."""
+        finished = []
+
+        async def run_bot(news_api_key, snapshot):
+            try:
+                asyncio.get_running_loop().call_later(0.1, os.kill, os.getpid(), signal.SIGTERM)
+                await asyncio.sleep(5)
+            finally:
+                finished.append(True)
+
+        with patch.dict(os.environ, {'NEWS_API_KEY': 'fake'}), patch.object(pipeline, 'run_bot', run_bot):
+            asyncio.run(pipeline.main())
+        self.assertEqual(finished, [True])
+
+if __name__ == '__main__':
+    unittest.main()
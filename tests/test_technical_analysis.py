@@ -1,6 +1,7 @@
 import unittest
 import pandas as pd
-from src.technical_analysis.indicators import add_rsi, add_macd, add_bollinger_bands
+from src.data_acquisition.exchange import closed_candles
+from src.technical_analysis.indicators import add_rsi, add_macd, add_bollinger_bands, indicator_cache, IndicatorCache
 
 class TestTechnicalAnalysis(unittest.TestCase):
 
@@ -17,6 +18,7 @@ class TestTechnicalAnalysis(unittest.TestCase):
             'volume': [1000 for _ in range(100)]
         }
         self.df = pd.DataFrame(data)
+        indicator_cache.clear()
 
     def test_add_rsi(self):
         """
@@ -47,5 +49,69 @@ class TestTechnicalAnalysis(unittest.TestCase):
         self.assertIn('BBU_20_2.0', df_with_bbands.columns) # Upper band
         self.assertFalse(df_with_bbands['BBL_20_2.0'].dropna().empty)
 
+    def closed_frame(self):
+        """Returns the sample data as closed candles from fetch_ohlcv."""
+        df = self.df.copy()
+        df.index = pd.date_range('2024-01-01', periods=len(df), freq='h')
+        df.attrs.update(exchange='kucoin', symbol='BTC/USDT', timeframe='1h')
+        return closed_candles(df, now=pd.Timestamp('2024-02-01').timestamp())
+
+    def test_indicator_cache_hits_for_unchanged_series(self):
+        """
+        Tests that recomputing an indicator on the same closed candles is served from the cache.
+        """
+        first = add_rsi(self.closed_frame())
+        second = add_rsi(self.closed_frame())
+        pd.testing.assert_series_equal(first['RSI_14'], second['RSI_14'])
+        self.assertEqual(indicator_cache.stats()['hits'], 1)
+        self.assertEqual(indicator_cache.stats()['misses'], 1)
+
+        # Different parameters are a different entry
+        add_rsi(self.closed_frame(), length=7)
+        self.assertEqual(indicator_cache.stats()['misses'], 2)
+
+    def test_indicator_cache_hits_while_candle_is_open(self):
+        """
+        Tests that polls within one candle hit once the open candle is dropped, and the next candle misses.
+        """
+        df = self.df.copy()
+        df.index = pd.date_range('2024-01-01', periods=len(df), freq='h')
+        df.attrs.update(exchange='kucoin', symbol='BTC/USDT', timeframe='1h')
+        last_open = df.index[-1].timestamp()
+
+        first = add_macd(closed_candles(df, now=last_open + 300))
+        df.loc[df.index[-1], 'close'] = 50  # The open candle moved between polls
+        second = add_macd(closed_candles(df, now=last_open + 600))
+        self.assertEqual(len(second), len(df) - 1)
+        pd.testing.assert_series_equal(first['MACD_12_26_9'], second['MACD_12_26_9'])
+        self.assertEqual(indicator_cache.stats()['hits'], 1)
+
+        # Once the candle closes it becomes part of the input and the cache misses
+        closed = add_macd(closed_candles(df, now=last_open + 3600))
+        uncached = df.copy()
+        uncached.ta.macd(append=True)
+        self.assertEqual(indicator_cache.stats()['misses'], 2)
+        pd.testing.assert_series_equal(closed['MACD_12_26_9'], uncached['MACD_12_26_9'])
+
+    def test_indicator_cache_skips_frames_with_open_candles(self):
+        """
+        Tests that frames not passed through closed_candles are always computed.
+        """
+        add_rsi(self.df.copy())
+        add_rsi(self.df.copy())
+        self.assertEqual(indicator_cache.stats()['hits'], 0)
+        self.assertEqual(indicator_cache.stats()['entries'], 0)
+
+    def test_indicator_cache_is_bounded(self):
+        """
+        Tests that the least recently used entries are evicted.
+        """
+        cache = IndicatorCache(max_entries=2)
+        df = self.closed_frame()
+        for length in (5, 6, 7):
+            cache.get_or_compute(df, 'rsi', (length,), lambda: length)
+        self.assertEqual(cache.stats()['entries'], 2)
+        self.assertEqual(cache.get_or_compute(df, 'rsi', (5,), lambda: 'recomputed'), 'recomputed')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import asyncio
+from unittest.mock import MagicMock, AsyncMock
+
+from src.telegram_bot.commands import (MarketSnapshot, RateLimiter, CommandResponder, build_command_application,
+                                       MAX_MESSAGE_LENGTH)
+
+class TestTelegramCommands(unittest.TestCase):
+
+    def setUp(self):
+        """Publish one cycle of readings."""
+        self.snapshot = MarketSnapshot()
+        self.snapshot.publish({
+            'BTC/USDT': {'signal': 'buy', 'price': 30000.0, 'rsi': 25.0, 'sentiment': 0.4,
+                         'timestamp': '2024-01-01 00:00:00'},
+            'ETH/USDT': {'signal': 'hold', 'price': 2000.0, 'rsi': 55.0, 'sentiment': -0.1,
+                         'timestamp': '2024-01-01 00:00:00'},
+            'SOL/USDT': {'signal': 'hold', 'price': 100.0, 'rsi': 80.0, 'sentiment': 0.0,
+                         'timestamp': '2024-01-01 00:00:00'},
+        })
+        self.responder = CommandResponder(self.snapshot, top_count=2)
+
+    def test_signal_command(self):
+        """Tests /signal for one symbol, by full symbol or base currency."""
+        reply = self.responder.respond('signal', ['btc/usdt'])
+        self.assertIn('BTC/USDT: BUY', reply)
+        self.assertIn('$30,000.00', reply)
+        self.assertEqual(self.responder.respond('signal', ['BTC']), reply)
+
+    def test_unknown_symbol(self):
+        """Tests that an unknown symbol lists the tracked symbols."""
+        self.assertIn('Tracked symbols', self.responder.respond('rsi', ['DOGE/USDT']))
+
+    def test_rsi_and_sentiment_for_all_symbols(self):
+        """Tests /rsi and /sentiment without arguments."""
+        self.assertEqual(len(self.responder.respond('rsi').splitlines()), 3)
+        self.assertIn('ETH/USDT: sentiment -0.100', self.responder.respond('sentiment'))
+
+    def test_replies_fit_telegram_limit_for_many_symbols(self):
+        """Tests that replies without a symbol are capped when hundreds of pairs are tracked."""
+        snapshot = MarketSnapshot()
+        snapshot.publish({f'COIN{i}/USDT': {'signal': 'hold', 'price': 1.0, 'rsi': 50.0, 'sentiment': 0.0,
+                                            'timestamp': '2024-01-01 00:00:00',
+                                            'freshness': {'candles': 0.0, 'sentiment': 600.0}}
+                          for i in range(500)})
+        responder = CommandResponder(snapshot, top_count=500)
+
+        for command in ('signal', 'rsi', 'sentiment', 'top'):
+            self.assertLessEqual(len(responder.respond(command)), MAX_MESSAGE_LENGTH)
+        lines = responder.respond('signal').splitlines()
+        self.assertEqual(len(lines), 21)
+        self.assertIn('480 more', lines[-1])
+        self.assertLessEqual(len(responder.respond('rsi', ['DOGE'])), MAX_MESSAGE_LENGTH)
+
+    def test_top_ranks_signals_then_rsi_extremes(self):
+        """Tests that /top lists actionable signals first, then the most stretched RSI."""
+        lines = self.responder.respond('top').splitlines()
+        self.assertTrue(lines[0].startswith('BTC/USDT'))
+        self.assertTrue(lines[1].startswith('SOL/USDT'))
+
+    def test_responses_cached_per_cycle(self):
+        """Tests that replies are reused within a cycle and rebuilt after the next publish."""
+        first = self.responder.respond('signal', ['ETH/USDT'])
+        self.snapshot.readings['ETH/USDT']['signal'] = 'sell'  # Not published, so not visible yet
+        self.assertEqual(self.responder.respond('signal', ['ETH/USDT']), first)
+
+        self.snapshot.publish({'ETH/USDT': dict(self.snapshot.readings['ETH/USDT'])})
+        self.assertIn('ETH/USDT: SELL', self.responder.respond('signal', ['ETH/USDT']))
+
+    def test_no_readings_yet(self):
+        """Tests the reply before the first cycle has finished."""
+        self.assertIn('No readings yet', CommandResponder(MarketSnapshot()).respond('signal'))
+
+    def test_rate_limiter(self):
+        """Tests that each user gets at most max_requests per window."""
+        limiter = RateLimiter(max_requests=2, per_seconds=10)
+        self.assertTrue(limiter.allow(1, now=0))
+        self.assertTrue(limiter.allow(1, now=1))
+        self.assertFalse(limiter.allow(1, now=2))
+        self.assertTrue(limiter.allow(2, now=2))
+        self.assertTrue(limiter.allow(1, now=10))
+
+    def test_rate_limiter_forgets_idle_users(self):
+        """Tests that users with no recent requests do not stay in memory."""
+        limiter = RateLimiter(max_requests=2, per_seconds=10)
+        for user_id in range(1000):
+            limiter.allow(user_id, now=0)
+        limiter.allow('new', now=25)
+        self.assertEqual(list(limiter._requests), ['new'])
+
+    def test_handler_replies_and_rate_limits(self):
+        """Tests the Telegram handler end to end with a mocked update."""
+        application = build_command_application('123:fake', self.snapshot, RateLimiter(max_requests=1))
+        handler = application.handlers[0][0]
+
+        update = MagicMock()
+        update.effective_user.id = 42
+        update.effective_message.text = '/signal@botpy_bot BTC/USDT'
+        update.effective_message.reply_text = AsyncMock()
+        context = MagicMock(args=['BTC/USDT'])
+
+        asyncio.run(handler.callback(update, context))
+        asyncio.run(handler.callback(update, context))
+
+        update.effective_message.reply_text.assert_awaited_once()
+        self.assertIn('BTC/USDT: BUY', update.effective_message.reply_text.await_args.args[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+import os
+import time
+import unittest
+import multiprocessing
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+
+from src.workers.pool import WorkerPool, SharedAnalyzer, assign_shards, run_shard, news_query_for
+from src.workers.memory import memory_usage
+from src.workers.broker import serve_broker, RemoteBroker
+
+def fake_analyzer():
+    return None
+
+def fake_shard_runner(analyzer, settings, symbols, state=None, sentiment_by_symbol=None):
+    """Returns a 'hold' result per symbol, tagged with the worker that produced it."""
+    sentiment_by_symbol = sentiment_by_symbol or {}
+    return [{'symbol': s, 'signal': 'hold', 'price': 1.0, 'sentiment': sentiment_by_symbol.get(s, 0.0),
+             'worker': settings['worker_id']} for s in symbols]
+
+class CountingAnalyzer:
+    """Scores every headline list 0.4 and counts its calls in a counter shared across processes."""
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __call__(self):
+        return self
+
+    def analyze_sentiment(self, headlines):
+        with self.calls.get_lock():
+            self.calls.value += 1
+        return 0.4
+
+def dying_shard_runner(analyzer, settings, symbols, state=None, sentiment_by_symbol=None):
+    """Kills worker local-0 as soon as it receives a shard."""
+    if settings['worker_id'] == 'local-0':
+        os._exit(1)
+    return fake_shard_runner(analyzer, settings, symbols)
+
+_slow_calls = []
+
+def slow_shard_runner(analyzer, settings, symbols, state=None, sentiment_by_symbol=None):
+    """Makes worker local-0 miss the shard timeout on its first shard only."""
+    if settings['worker_id'] == 'local-0' and not _slow_calls:
+        _slow_calls.append(symbols)
+        time.sleep(1.0)
+    return fake_shard_runner(analyzer, settings, symbols)
+
+def identity_shard_runner(analyzer, settings, symbols, state=None, sentiment_by_symbol=None):
+    """Reports which analyzer object each worker used."""
+    return [{'symbol': s, 'analyzer_id': id(analyzer), 'model_size': len(analyzer.weights)} for s in symbols]
+
+class TestWorkers(unittest.TestCase):
+
+    def setUp(self):
+        self.symbols = [f'COIN{i}/USDT' for i in range(20)]
+        self.settings = {'exchange_name': 'kucoin', 'timeframe': '1h', 'limit': 50}
+        self.context = multiprocessing.get_context('fork')
+
+    def test_assign_shards_is_stable_and_complete(self):
+        """Tests that every symbol is assigned exactly once and assignment is deterministic."""
+        shards = assign_shards(self.symbols, ['w1', 'w0', 'w2'])
+        assigned = [s for shard in shards.values() for s in shard]
+        self.assertEqual(sorted(assigned), sorted(self.symbols))
+        self.assertEqual(shards, assign_shards(self.symbols, ['w2', 'w1', 'w0']))
+
+    def test_news_query_for(self):
+        """Tests that symbols use the default query unless their base currency has its own."""
+        self.assertEqual(news_query_for('BTC/USDT'), 'Bitcoin')
+        self.assertEqual(news_query_for('OP/USDT'), 'Bitcoin')
+        self.assertEqual(news_query_for('ETH/USDT', {'ETH': 'Ethereum'}, 'Crypto'), 'Ethereum')
+        self.assertEqual(news_query_for('OP/USDT', {'ETH': 'Ethereum'}, 'Crypto'), 'Crypto')
+
+    @patch('src.workers.pool.fetch_ohlcv')
+    def test_run_shard_uses_given_sentiment(self, mock_fetch_ohlcv):
+        """Tests that run_shard analyzes every symbol with the sentiment it was given, without scoring news."""
+        mock_fetch_ohlcv.side_effect = lambda **kw: pd.DataFrame({'close': [float(i) for i in range(1, 61)]})
+        analyzer = MagicMock()
+
+        with patch('src.workers.pool.add_rsi'), patch('src.workers.pool.add_macd'), \
+             patch('src.workers.pool.add_bollinger_bands'):
+            results = run_shard(analyzer, self.settings, ['BTC/USDT', 'ETH/USDT'],
+                                sentiment_by_symbol={'BTC/USDT': 0.3})
+
+        self.assertEqual([r['symbol'] for r in results], ['BTC/USDT', 'ETH/USDT'])
+        self.assertEqual(results[0]['price'], 60.0)
+        self.assertEqual([r['sentiment'] for r in results], [0.3, 0.0])
+        analyzer.analyze_sentiment.assert_not_called()
+
+    def test_pool_scores_each_query_once(self):
+        """Tests that each news query is scored once per cycle and its score reaches every symbol using it."""
+        calls = self.context.Value('i', 0)
+        settings = dict(self.settings, news_query='Crypto', news_queries={'COIN1': 'Coin one'})
+        pool = WorkerPool(3, settings, analyzer_factory=CountingAnalyzer(calls),
+                          shard_runner=fake_shard_runner, context=self.context)
+        pool.start()
+        try:
+            self.assertEqual(set(pool.news_queries(self.symbols).values()), {'Crypto', 'Coin one'})
+            results = pool.run_cycle(self.symbols, {'Crypto': ['Headline'], 'Coin one': []})
+        finally:
+            pool.stop()
+        self.assertEqual(calls.value, 1)
+        sentiment = {r['symbol']: r['sentiment'] for r in results}
+        self.assertEqual(sentiment.pop('COIN1/USDT'), 0.0)
+        self.assertEqual(set(sentiment.values()), {0.4})
+        self.assertGreater(len({r['worker'] for r in results}), 1)
+
+    def test_pool_runs_cycle(self):
+        """Tests that a pool of worker processes returns one result per symbol."""
+        pool = WorkerPool(3, self.settings, analyzer_factory=fake_analyzer,
+                          shard_runner=fake_shard_runner, context=self.context)
+        pool.start()
+        try:
+            results = pool.run_cycle(self.symbols)
+        finally:
+            pool.stop()
+        self.assertEqual(sorted(r['symbol'] for r in results), sorted(self.symbols))
+        self.assertGreater(len({r['worker'] for r in results}), 1)
+
+    def test_pool_rebalances_when_worker_dies(self):
+        """Tests that the symbols of a dead worker are reassigned to the others."""
+        pool = WorkerPool(3, self.settings, analyzer_factory=fake_analyzer,
+                          shard_runner=dying_shard_runner, context=self.context)
+        pool.start()
+        try:
+            results = pool.run_cycle(self.symbols)
+            alive = set(pool.alive)
+        finally:
+            pool.stop()
+        self.assertEqual(sorted(r['symbol'] for r in results), sorted(self.symbols))
+        self.assertNotIn('local-0', alive)
+        self.assertNotIn('local-0', {r['worker'] for r in results})
+
+    def test_pool_readmits_slow_worker(self):
+        """Tests that a worker that missed the shard timeout once takes shards again after it replies."""
+        pool = WorkerPool(3, self.settings, shard_timeout=0.5, analyzer_factory=fake_analyzer,
+                          shard_runner=slow_shard_runner, context=self.context)
+        pool.start()
+        try:
+            first = pool.run_cycle(self.symbols)
+            self.assertNotIn('local-0', pool.alive)
+            time.sleep(1.0)
+            second = pool.run_cycle(self.symbols)
+            alive = set(pool.alive)
+        finally:
+            pool.stop()
+        self.assertEqual(sorted(r['symbol'] for r in first), sorted(self.symbols))
+        self.assertEqual(sorted(r['symbol'] for r in second), sorted(self.symbols))
+        self.assertIn('local-0', alive)
+        self.assertIn('local-0', {r['worker'] for r in second})
+
+    def test_pool_restarts_exited_worker(self):
+        """Tests that a local worker that exited is restarted at the start of the next cycle."""
+        pool = WorkerPool(2, self.settings, analyzer_factory=fake_analyzer,
+                          shard_runner=fake_shard_runner, context=self.context)
+        pool.start()
+        try:
+            old_process = pool.processes['local-0']
+            old_process.terminate()
+            old_process.join()
+            results = pool.run_cycle(self.symbols)
+            restarted = pool.processes['local-0']
+        finally:
+            pool.stop()
+        self.assertIsNot(restarted, old_process)
+        self.assertIn('local-0', {r['worker'] for r in results})
+
+    def test_shared_analyzer_is_inherited_by_forked_workers(self):
+        """Tests that forked workers use the analyzer loaded in the parent and report their memory."""
+        analyzer = MagicMock(weights=bytearray(8 * 1024 * 1024))
+        pool = WorkerPool(2, self.settings, analyzer_factory=SharedAnalyzer(analyzer),
+                          shard_runner=identity_shard_runner, context=self.context)
+        pool.start()
+        try:
+            results = pool.run_cycle(self.symbols)
+            report = pool.memory_report()
+        finally:
+            pool.stop()
+
+        self.assertEqual({r['analyzer_id'] for r in results}, {id(analyzer)})
+        self.assertEqual({r['model_size'] for r in results}, {8 * 1024 * 1024})
+        self.assertEqual(set(pool.memory), {'local-0', 'local-1'})
+        self.assertEqual(len(report), 3)
+
+    def test_shared_analyzer_requires_fork(self):
+        """Tests that sharing a loaded model is refused for start methods that would copy it."""
+        pool = WorkerPool(1, self.settings, analyzer_factory=SharedAnalyzer(MagicMock()),
+                          context=multiprocessing.get_context('spawn'))
+        with self.assertRaises(ValueError):
+            pool.start()
+
+    def test_broker_requires_authkey(self):
+        """Tests that a broker is never started or reached without an auth key."""
+        with self.assertRaises(ValueError):
+            serve_broker(('127.0.0.1', 0), b'')
+        with self.assertRaises(ValueError):
+            RemoteBroker(('127.0.0.1', 1), b'')
+
+    def test_memory_usage(self):
+        """Tests that the current process reports a positive RSS."""
+        usage = memory_usage()
+        self.assertGreater(usage['rss'], 0)
+
+    def test_memory_usage_without_proc_or_resource(self):
+        """Tests that memory_usage returns None where neither /proc nor resource exists (Windows)."""
+        with patch('builtins.open', side_effect=OSError), patch.dict('sys.modules', {'resource': None}):
+            self.assertIsNone(memory_usage())
+
+if __name__ == '__main__':
+    unittest.main()